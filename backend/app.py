@@ -5,12 +5,23 @@ import os
 import uuid
 import threading
 import time
+import logging
+
+# Service modules log through the logging module; LOG_LEVEL=DEBUG shows per-strategy traces
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+
+# Verify TLS (yt-dlp included) against the system CA store through one shared SSLContext
+try:
+    import truststore
+    truststore.inject_into_ssl()
+except ImportError:
+    print("⚠️ truststore not available - using yt-dlp's bundled CA certificates")
 
 # Import route resources
 from routes.upload import FileUploadResource, FileInfoResource
 from routes.youtube import YouTubeDownloadResource, YouTubeInfoResource, YouTubePreviewResource
 from routes.process import ProcessResource, DownloadResource
-from routes.sheet_music import SheetMusicResource, SheetMusicDownloadResource, SheetMusicInfoResource, SheetMusicTestResource
+from routes.sheet_music import SheetMusicResource, SheetMusicJobResource, SheetMusicDownloadResource, SheetMusicInfoResource, SheetMusicTestResource
 
 # Import AI processor
 from services.ai_processor import AIProcessor
@@ -74,6 +85,7 @@ api.add_resource(YouTubePreviewResource, '/api/youtube/preview')
 api.add_resource(ProcessResource, '/api/process/<string:process_id>')
 api.add_resource(DownloadResource, '/api/download/<string:process_id>')
 api.add_resource(SheetMusicResource, '/api/sheet-music/<string:process_id>')
+api.add_resource(SheetMusicJobResource, '/api/sheet-music/jobs/<string:job_id>')
 api.add_resource(SheetMusicDownloadResource, '/api/sheet-music/download/<string:process_id>')
 api.add_resource(SheetMusicInfoResource, '/api/sheet-music/info')
 api.add_resource(SheetMusicTestResource, '/api/sheet-music/test')
@@ -11,10 +11,14 @@ import time
 import logging
 from config import config
 
+# Service modules log through the logging module; LOG_LEVEL=DEBUG shows per-strategy traces
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+
 # Import route resources
 from routes.upload import FileUploadResource, FileInfoResource
 from routes.youtube import YouTubeDownloadResource, YouTubeInfoResource, YouTubePreviewResource
 from routes.process import ProcessResource, DownloadResource
+from routes.sheet_music import SheetMusicResource, SheetMusicJobResource, SheetMusicDownloadResource, SheetMusicInfoResource, SheetMusicTestResource
 
 # Import AI processor
 from services.ai_processor import AIProcessor
@@ -37,6 +41,9 @@ def create_app(config_name=None):
     # Initialize Flask-RESTful
     api = Api(app)
     
+    # Use the system CA store for outgoing TLS
+    init_truststore(app)
+    
     # Initialize AI model
     init_ai_model(app)
     
@@ -52,6 +59,14 @@ def create_app(config_name=None):
     
     return app
 
+def init_truststore(app):
+    """Verify TLS (yt-dlp included) against the system CA store through one shared SSLContext"""
+    try:
+        import truststore
+        truststore.inject_into_ssl()
+    except ImportError:
+        app.logger.warning("truststore not available - using yt-dlp's bundled CA certificates")
+
 def init_ai_model(app):
     """Initialize AI model safely with download support for Railway"""
     with app.app_context():
@@ -129,6 +144,11 @@ def register_routes(api):
     api.add_resource(YouTubePreviewResource, '/api/youtube/preview')
     api.add_resource(ProcessResource, '/api/process/<string:process_id>')
     api.add_resource(DownloadResource, '/api/download/<string:process_id>')
+    api.add_resource(SheetMusicResource, '/api/sheet-music/<string:process_id>')
+    api.add_resource(SheetMusicJobResource, '/api/sheet-music/jobs/<string:job_id>')
+    api.add_resource(SheetMusicDownloadResource, '/api/sheet-music/download/<string:process_id>')
+    api.add_resource(SheetMusicInfoResource, '/api/sheet-music/info')
+    api.add_resource(SheetMusicTestResource, '/api/sheet-music/test')
 
 def register_general_routes(app):
     """Register general Flask routes"""
@@ -5,11 +5,18 @@ from functools import wraps
 from flask import request, jsonify, current_app
 import time
 import hashlib
+import re
 from collections import defaultdict
 
 # Rate limiting storage (in production, use Redis)
 request_counts = defaultdict(list)
 
+# Drops characters that are invalid in filenames in one str.translate pass
+_INVALID_FILENAME_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+# Patterns compiled once at import
+# Only allow YouTube URLs (watch, short and embed forms) in a single alternation
+_YOUTUBE_URL_RE = re.compile(r'https?://(?:www\.)?(?:youtube\.com/(?:watch\?v=|embed/)|youtu\.be/)[\w-]+')
+
 def rate_limit(max_requests=10, per_seconds=60):
     """Rate limiting decorator"""
     def decorator(f):
@@ -83,13 +90,12 @@ def validate_file_upload(allowed_extensions=None, max_size=None):
 def sanitize_filename(filename):
     """Sanitize filename to prevent path traversal attacks"""
     import os
-    import re
     
     # Remove path components
     filename = os.path.basename(filename)
     
     # Remove invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = filename.translate(_INVALID_FILENAME_TABLE)
     
     # Limit length
     if len(filename) > 100:
@@ -104,23 +110,10 @@ def sanitize_filename(filename):
 
 def validate_youtube_url(url):
     """Validate YouTube URL to prevent SSRF attacks"""
-    import re
-    
     if not url or not isinstance(url, str):
         return False
     
-    # Only allow YouTube URLs
-    youtube_patterns = [
-        r'^https?://(www\.)?youtube\.com/watch\?v=[\w-]+',
-        r'^https?://(www\.)?youtu\.be/[\w-]+',
-        r'^https?://(www\.)?youtube\.com/embed/[\w-]+',
-    ]
-    
-    for pattern in youtube_patterns:
-        if re.match(pattern, url):
-            return True
-    
-    return False
+    return _YOUTUBE_URL_RE.match(url) is not None
 
 class SecurityHeaders:
     """Add security headers to all responses"""
@@ -144,21 +144,8 @@ class ProcessResource(Resource):
             if success:
                 self._update_progress(process_id, 25, "YouTube download completed")
                 
-                # Find the actual downloaded file (could be .webm, .m4a, etc.)
-                base_path = audio_path.replace('.wav', '')
-                possible_files = [
-                    f"{base_path}.webm",
-                    f"{base_path}.m4a", 
-                    f"{base_path}.mp4",
-                    f"{base_path}.opus",
-                    audio_path  # Original .wav
-                ]
-                
-                actual_file = None
-                for possible_file in possible_files:
-                    if os.path.exists(possible_file):
-                        actual_file = possible_file
-                        break
+                # Find the actual downloaded file (could be .webm, .m4a, etc.) with one directory scan
+                actual_file = YouTubeDownloader.find_downloaded_file(os.path.splitext(audio_path)[0])
                 
                 if actual_file:
                     print(f"✅ Found downloaded file: {actual_file}")
@@ -117,9 +117,12 @@ class ProcessResource(Resource):
             # Check if already WAV
             original_filename = process_info.get('original_filename', '')
             if original_filename.lower().endswith('.wav'):
-                # Copy/rename the file
-                import shutil
-                shutil.copy2(file_path, wav_path)
+                # Hardlink the file (no data copied), copying only across filesystems
+                try:
+                    os.link(file_path, wav_path)
+                except OSError:
+                    import shutil
+                    shutil.copy2(file_path, wav_path)
                 conversion_success = True
                 conversion_message = "File already in WAV format"
             else:
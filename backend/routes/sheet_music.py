@@ -19,7 +19,8 @@ class SheetMusicResource(Resource):
         
         Expected JSON body:
         {
-            "format": "musicxml" | "png"  # optional, defaults to musicxml
+            "format": "musicxml" | "png",  # optional, defaults to musicxml
+            "async": true | false          # optional, queue the conversion and return a job ID
         }
         """
         try:
@@ -66,6 +67,17 @@ class SheetMusicResource(Resource):
                     'message': f'Supported formats: {get_supported_sheet_formats()}'
                 }, 400
             
+            # Queue the conversion instead of blocking this worker on music21
+            if data.get('async'):
+                job_id = SheetMusicGenerator.submit_conversion(midi_file_path, output_format)
+                return {
+                    'success': True,
+                    'job_id': job_id,
+                    'sheet_music_id': process_id,
+                    'format': output_format,
+                    'status_url': f'/api/sheet-music/jobs/{job_id}'
+                }, 202
+            
             # Generate sheet music
             if output_format == 'musicxml':
                 success, output_path, message = SheetMusicGenerator.midi_to_musicxml(midi_file_path)
@@ -100,6 +112,27 @@ class SheetMusicResource(Resource):
             }, 500
 
 
+class SheetMusicJobResource(Resource):
+    """Check the status of a queued sheet music conversion"""
+    
+    def get(self, job_id):
+        """Get sheet music job status"""
+        job = SheetMusicGenerator.get_conversion_status(job_id)
+        if job is None:
+            return {
+                'error': 'Job not found',
+                'message': f'No sheet music job found for ID: {job_id}'
+            }, 404
+        
+        output_path = job['output_path']
+        return {
+            'job_id': job_id,
+            'status': job['status'],
+            'message': job['message'],
+            'file_size': os.path.getsize(output_path) if output_path and os.path.exists(output_path) else 0
+        }
+
+
 class SheetMusicDownloadResource(Resource):
     """Download generated sheet music files"""
     
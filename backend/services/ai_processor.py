@@ -7,6 +7,9 @@ from models.piano_transcription import load_model, create_model
 from services.audio_processor import process_audio_for_inference, validate_audio_file, chunk_audio_features
 from services.midi_generator import predictions_to_midi, create_test_midi, analyze_predictions
 
+# bf16 autocast on CPU is opt-in: it only pays off on CPUs with native bf16 (AVX512-BF16/AMX)
+CPU_BF16_AUTOCAST = os.environ.get('AI_CPU_BF16') == '1'
+
 class AIProcessor:
     """
     Piano Transcription AI Processor using CRNN model
@@ -50,6 +53,10 @@ class AIProcessor:
                 else:
                     print("📝 Using model with random weights (for testing)")
             
+            # NHWC conv weights let oneDNN/cuDNN skip layout transposes; the model's
+            # 1-channel conv input is already channels_last, so inputs need no change
+            cls._model = cls._model.to(memory_format=torch.channels_last)
+            
             return True
             
         except Exception as e:
@@ -95,15 +102,15 @@ class AIProcessor:
             
             # Step 2: Process audio to features (clip to 30 seconds)
             print("🔄 Extracting audio features...")
-            features = process_audio_for_inference(wav_file_path, max_length_seconds=30.0)
+            features = process_audio_for_inference(wav_file_path, max_length_seconds=30.0, device=cls._device)
             if features is None:
                 return False, "Audio feature extraction failed"
             
             # Step 3: Run model inference
             print(f"🧠 Running AI model inference on {cls._device}...")
-            features = features.to(cls._device)
             
-            with torch.no_grad():
+            # inference_mode also skips autograd's version counters and view tracking
+            with torch.inference_mode(), cls._autocast():
                 cls._model.eval()
                 
                 # Handle long audio by chunking - more aggressive for Railway
@@ -112,6 +119,9 @@ class AIProcessor:
                 else:
                     predictions = cls._model(features)  # [1, 88, T]
             
+            # Thresholding and MIDI conversion work on fp32 (NumPy has no bf16)
+            predictions = predictions.float()
+            
             # Step 4: Analyze predictions for debugging
             analysis = analyze_predictions(predictions)
             print(f"📊 Prediction analysis: {analysis['active_keys']} active keys, "
@@ -138,6 +148,13 @@ class AIProcessor:
             except:
                 return False, f"AI processing failed: {str(e)}"
     
+    @classmethod
+    def _autocast(cls):
+        """Mixed-precision context for model forwards: fp16 on CUDA, opt-in bf16 on CPU"""
+        if cls._device.type == 'cuda':
+            return torch.autocast(device_type='cuda', dtype=torch.float16)
+        return torch.autocast(device_type='cpu', dtype=torch.bfloat16, enabled=CPU_BF16_AUTOCAST)
+    
     @classmethod
     def _process_long_audio(cls, features):
         """
@@ -151,12 +168,18 @@ class AIProcessor:
         """
         print("📏 Processing long audio in chunks...")
         chunks = chunk_audio_features(features)
-        chunk_predictions = []
         
-        for i, chunk in enumerate(chunks):
-            print(f"   Chunk {i+1}/{len(chunks)}: {chunk.shape}")
-            chunk_pred = cls._model(chunk)
-            chunk_predictions.append(chunk_pred)
+        # Every chunk but the last has the same length, so they run as one batch
+        # [B, 128, chunk_frames]; a shorter tail chunk gets its own forward pass
+        # rather than padding, which would change its predictions
+        full_chunks = [chunk for chunk in chunks if chunk.shape[2] == chunks[0].shape[2]]
+        tail_chunks = chunks[len(full_chunks):]
+        print(f"   Batch of {len(full_chunks)} chunks: {chunks[0].shape[1:]}"
+              + (f" + tail {tail_chunks[0].shape}" if tail_chunks else ""))
+        
+        batch_pred = cls._model(torch.cat(full_chunks, dim=0))  # [B, 88, chunk_frames]
+        chunk_predictions = [batch_pred.permute(1, 0, 2).reshape(1, batch_pred.shape[1], -1)]
+        chunk_predictions += [cls._model(chunk) for chunk in tail_chunks]
         
         # Concatenate along time dimension
         full_predictions = torch.cat(chunk_predictions, dim=2)
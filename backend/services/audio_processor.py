@@ -3,8 +3,12 @@ Audio Processing Pipeline - Extracted from training.ipynb
 Handles audio loading, preprocessing, and feature extraction for piano transcription
 """
 
+import functools
+import os
 import numpy as np
 import librosa
+import soundfile as sf
+import ffmpeg
 import torch
 from pathlib import Path
 
@@ -14,6 +18,7 @@ SAMPLE_RATE = 16000
 N_MELS = 128
 N_FFT = 2048
 HOP_LENGTH = 512
+FRAME_DURATION = HOP_LENGTH / SAMPLE_RATE  # seconds per spectrogram frame
 WINDOW_SIZE_SECONDS = 10.0
 MIN_RECORDING_LENGTH = 5.0
 
@@ -51,6 +56,44 @@ def standardize_audio(audio_path: Path) -> tuple[np.ndarray, int]:
         return None, None
 
 
+@functools.lru_cache(maxsize=8)
+def _mel_transform(sr: int, device: str) -> tuple[torch.Tensor, torch.Tensor]:
+    """Hann window and librosa's (Slaney) mel filterbank, built once per sample rate and device"""
+    window = torch.hann_window(N_FFT, device=device)
+    mel_basis = torch.from_numpy(librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=N_MELS)).to(device)
+    return window, mel_basis
+
+
+def compute_mel_features(audio: np.ndarray, sr: int, device='cpu') -> torch.Tensor:
+    """
+    Normalized log-mel features as a tensor, computed with torch.stft on the given device
+    
+    Matches librosa's melspectrogram + power_to_db(ref=np.max) + standardization (the
+    training features) to float32 rounding; the ref offset cancels in the standardization
+    
+    Args:
+        audio: Audio array
+        sr: Sample rate
+        device: torch device to compute on (the features stay there)
+        
+    Returns:
+        torch.Tensor: Features [1, 128, T]
+    """
+    device = str(device)
+    window, mel_basis = _mel_transform(sr, device)
+    
+    waveform = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)).to(device)
+    spectrum = torch.stft(waveform, N_FFT, HOP_LENGTH, window=window, center=True,
+                          pad_mode='constant', return_complex=True)
+    mel_spec = mel_basis @ (spectrum.real.square() + spectrum.imag.square())
+    
+    # power_to_db with amin=1e-10 and top_db=80
+    mel_spec_db = 10.0 * torch.log10(torch.clamp(mel_spec, min=1e-10))
+    mel_spec_db = torch.maximum(mel_spec_db, mel_spec_db.max() - 80.0)
+    mel_spec_norm = (mel_spec_db - mel_spec_db.mean()) / (mel_spec_db.std(correction=0) + 1e-8)
+    return mel_spec_norm.unsqueeze(0)
+
+
 def extract_audio_features(audio: np.ndarray, sr: int) -> np.ndarray:
     """
     Extract mel spectrogram features
@@ -63,12 +106,7 @@ def extract_audio_features(audio: np.ndarray, sr: int) -> np.ndarray:
         features: Mel spectrogram features (time, mel_bins) or None if error
     """
     try:
-        mel_spec = librosa.feature.melspectrogram(
-            y=audio, sr=sr, n_mels=N_MELS, n_fft=N_FFT, hop_length=HOP_LENGTH
-        )
-        mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
-        mel_spec_norm = (mel_spec_db - mel_spec_db.mean()) / (mel_spec_db.std() + 1e-8)
-        features = mel_spec_norm.T  # (time, features)
+        features = compute_mel_features(audio, sr)[0].numpy().T  # (time, features)
         
         return features
     except Exception as e:
@@ -76,13 +114,14 @@ def extract_audio_features(audio: np.ndarray, sr: int) -> np.ndarray:
         return None
 
 
-def process_audio_for_inference(audio_path: str, max_length_seconds: float = None) -> torch.Tensor:
+def process_audio_for_inference(audio_path: str, max_length_seconds: float = None, device='cpu') -> torch.Tensor:
     """
     Complete audio processing pipeline for model inference
     
     Args:
         audio_path: Path to audio file
         max_length_seconds: Maximum length to process (None for full length)
+        device: torch device to compute the features on (the model's device)
         
     Returns:
         torch.Tensor: Processed audio features [1, 128, T] ready for model input
@@ -106,14 +145,8 @@ def process_audio_for_inference(audio_path: str, max_length_seconds: float = Non
             print(f"Audio too short: {len(audio)/sr:.1f}s (minimum {MIN_RECORDING_LENGTH}s)")
             return None
             
-        # Step 4: Extract features
-        features = extract_audio_features(audio, sr)
-        if features is None:
-            return None
-            
-        # Step 5: Convert to tensor and add batch dimension
-        # features shape: (time, 128) -> (1, 128, time)
-        features_tensor = torch.FloatTensor(features.T).unsqueeze(0)
+        # Step 4: Extract features straight into a [1, 128, time] tensor on the model's device
+        features_tensor = compute_mel_features(audio, sr, device)
         
         print(f"✅ Processed audio: {len(audio)/sr:.1f}s -> {features_tensor.shape}")
         return features_tensor
@@ -138,7 +171,7 @@ def chunk_audio_features(features: torch.Tensor, chunk_size_seconds: float = WIN
         raise ValueError(f"Expected features shape [1, 128, T], got {features.shape}")
     
     # Calculate chunk size in frames
-    chunk_frames = int(chunk_size_seconds * SAMPLE_RATE / HOP_LENGTH)
+    chunk_frames = int(chunk_size_seconds / FRAME_DURATION)
     total_frames = features.shape[2]
     
     if total_frames <= chunk_frames:
@@ -156,6 +189,29 @@ def chunk_audio_features(features: torch.Tensor, chunk_size_seconds: float = WIN
     return chunks
 
 
+def get_audio_header_info(audio_path: str) -> tuple[float, int]:
+    """
+    Read duration and sample rate from the file header without decoding audio
+    
+    Uses soundfile for WAV/FLAC/OGG and falls back to ffprobe for containers
+    soundfile cannot parse (mp3, mp4, webm, m4a, ...)
+    
+    Args:
+        audio_path: Path to audio file
+        
+    Returns:
+        tuple: (duration_seconds, sample_rate)
+    """
+    try:
+        info = sf.info(audio_path)
+        return info.frames / info.samplerate, info.samplerate
+    except Exception:
+        probe = ffmpeg.probe(audio_path)
+        audio_stream = next((stream for stream in probe['streams']
+                             if stream['codec_type'] == 'audio'), {})
+        return float(probe['format']['duration']), int(audio_stream.get('sample_rate', 0))
+
+
 def validate_audio_file(audio_path: str) -> tuple[bool, str]:
     """
     Validate that audio file can be processed
@@ -167,14 +223,19 @@ def validate_audio_file(audio_path: str) -> tuple[bool, str]:
         tuple: (is_valid, message)
     """
     try:
-        if not Path(audio_path).exists():
+        try:
+            file_size = os.path.getsize(audio_path)
+        except OSError:
             return False, "File does not exist"
         
-        # Try to load audio info without full loading
+        if file_size == 0:
+            return False, "Audio file appears to be empty"
+        
+        # Read duration from the header without decoding the file
         try:
-            info = librosa.get_duration(path=audio_path)
-            if info < MIN_RECORDING_LENGTH:
-                return False, f"Audio too short: {info:.1f}s (minimum {MIN_RECORDING_LENGTH}s)"
+            duration, _ = get_audio_header_info(audio_path)
+            if duration < MIN_RECORDING_LENGTH:
+                return False, f"Audio too short: {duration:.1f}s (minimum {MIN_RECORDING_LENGTH}s)"
         except Exception:
             # If we can't get duration, try loading the file
             audio, sr = librosa.load(audio_path, sr=None, duration=1.0)  # Load just 1 second
@@ -191,13 +252,12 @@ def validate_audio_file(audio_path: str) -> tuple[bool, str]:
 def print_audio_info(audio_path: str):
     """Print detailed information about an audio file"""
     try:
-        duration = librosa.get_duration(path=audio_path)
-        sr = librosa.get_samplerate(audio_path)
+        duration, sr = get_audio_header_info(audio_path)
         
         print(f"🎵 Audio Info for {Path(audio_path).name}:")
         print(f"   Duration: {duration:.2f} seconds")
         print(f"   Sample Rate: {sr} Hz")
-        print(f"   Expected frames: {int(duration * SAMPLE_RATE / HOP_LENGTH)}")
+        print(f"   Expected frames: {int(duration / FRAME_DURATION)}")
         print(f"   Min length check: {'✅' if duration >= MIN_RECORDING_LENGTH else '❌'}")
         
     except Exception as e:
@@ -1,26 +1,32 @@
 """
 MIDI Generation from Piano Roll Predictions
-Converts model output to MIDI files using pretty_midi
+Converts model output to MIDI files using mido (predictions) and pretty_midi (test melodies)
 """
 
 import numpy as np
 import torch
+import mido
 import pretty_midi
 from typing import Optional
 
+from services.audio_processor import SAMPLE_RATE, HOP_LENGTH, FRAME_DURATION
+
 
 # Constants from training notebook
 MIN_MIDI_NOTE = 21   # A0
 MAX_MIDI_NOTE = 108  # C8
-SAMPLE_RATE = 16000
-HOP_LENGTH = 512
+
+# MIDI file resolution (same default as pretty_midi)
+TICKS_PER_BEAT = 220
+ACOUSTIC_GRAND_PIANO = 0
 
 
 def predictions_to_midi(predictions: torch.Tensor, 
                        output_path: str,
                        threshold: float = 0.5,
                        velocity: int = 64,
-                       tempo: float = 120.0) -> bool:
+                       tempo: float = 120.0,
+                       already_probs: bool = False) -> bool:
     """
     Convert piano roll predictions to MIDI file
     
@@ -30,6 +36,8 @@ def predictions_to_midi(predictions: torch.Tensor,
         threshold: Probability threshold for note detection (0.5)
         velocity: MIDI velocity for all notes (64)
         tempo: Tempo in BPM (120)
+        already_probs: True if predictions are already probabilities
+                       (e.g. from enhance_predictions), so sigmoid is skipped
         
     Returns:
         bool: True if successful, False otherwise
@@ -41,51 +49,24 @@ def predictions_to_midi(predictions: torch.Tensor,
         elif predictions.dim() != 2:
             raise ValueError(f"Expected predictions shape [88, T] or [1, 88, T], got {predictions.shape}")
         
-        # Convert to numpy and apply sigmoid + threshold
+        # Convert to numpy and apply sigmoid (unless already probabilities) + threshold
         if isinstance(predictions, torch.Tensor):
-            probs = torch.sigmoid(predictions).cpu().numpy()
+            if already_probs:
+                probs = predictions.cpu().numpy()
+            else:
+                probs = torch.sigmoid(predictions).cpu().numpy()
         else:
             probs = predictions
             
         binary_piano_roll = (probs > threshold).astype(bool)
         
-        # Create MIDI object
-        midi = pretty_midi.PrettyMIDI(initial_tempo=tempo)
-        piano_program = pretty_midi.instrument_name_to_program('Acoustic Grand Piano')
-        piano = pretty_midi.Instrument(program=piano_program)
-        
-        # Convert frame times to seconds
-        frame_rate = SAMPLE_RATE / HOP_LENGTH  # frames per second
-        frame_duration = 1.0 / frame_rate  # seconds per frame
-        
-        # Extract notes for each piano key
-        for key_idx in range(binary_piano_roll.shape[0]):
-            midi_note = MIN_MIDI_NOTE + key_idx
-            key_activations = binary_piano_roll[key_idx, :]
-            
-            # Find note onset and offset times
-            note_events = extract_note_events(key_activations)
-            
-            for start_frame, end_frame in note_events:
-                start_time = start_frame * frame_duration
-                end_time = end_frame * frame_duration
-                
-                # Create MIDI note
-                note = pretty_midi.Note(
-                    velocity=velocity,
-                    pitch=midi_note,
-                    start=start_time,
-                    end=end_time
-                )
-                piano.notes.append(note)
-        
-        # Add instrument to MIDI
-        midi.instruments.append(piano)
-        
         # Save MIDI file
-        midi.write(output_path)
+        pitches, start_times, end_times = piano_roll_to_notes(binary_piano_roll)
+        write_midi_notes(output_path, pitches, start_times, end_times,
+                         velocity=velocity, tempo=tempo)
         
-        print(f"✅ MIDI saved: {len(piano.notes)} notes, {midi.get_end_time():.1f}s duration")
+        end_time = float(end_times.max()) if len(end_times) else 0.0
+        print(f"✅ MIDI saved: {len(pitches)} notes, {end_time:.1f}s duration")
         return True
         
     except Exception as e:
@@ -93,6 +74,121 @@ def predictions_to_midi(predictions: torch.Tensor,
         return False
 
 
+def predictions_batch_to_midi(predictions: torch.Tensor,
+                              output_paths: list[str],
+                              threshold: float = 0.5,
+                              velocity: int = 64,
+                              tempo: float = 120.0,
+                              already_probs: bool = False) -> list[bool]:
+    """
+    Convert a batch of piano roll predictions to one MIDI file each
+    
+    The whole batch is thresholded on its device and copied to the CPU once, as
+    a bool piano roll, before the per-item note extraction and writes
+    
+    Args:
+        predictions: Model output tensor [B, 88, T]
+        output_paths: One output MIDI path per batch item
+        threshold: Probability threshold for note detection (0.5)
+        velocity: MIDI velocity for all notes (64)
+        tempo: Tempo in BPM (120)
+        already_probs: True if predictions are already probabilities
+        
+    Returns:
+        list: True/False per batch item
+    """
+    try:
+        if predictions.dim() != 3 or predictions.shape[0] != len(output_paths):
+            raise ValueError(f"Expected predictions [B, 88, T] with B={len(output_paths)}, got {tuple(predictions.shape)}")
+        
+        probs = predictions if already_probs else torch.sigmoid(predictions)
+        binary_piano_rolls = (probs > threshold).cpu().numpy()
+    except Exception as e:
+        print(f"❌ MIDI generation failed: {e}")
+        return [False] * len(output_paths)
+    
+    results = []
+    for binary_piano_roll, output_path in zip(binary_piano_rolls, output_paths):
+        try:
+            pitches, start_times, end_times = piano_roll_to_notes(binary_piano_roll)
+            write_midi_notes(output_path, pitches, start_times, end_times,
+                             velocity=velocity, tempo=tempo)
+            results.append(True)
+        except Exception as e:
+            print(f"❌ MIDI generation failed for {output_path}: {e}")
+            results.append(False)
+    
+    print(f"✅ MIDI saved: {sum(results)}/{len(results)} files")
+    return results
+
+
+def piano_roll_to_notes(binary_piano_roll: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extract notes from a binary piano roll as flat arrays
+    
+    Args:
+        binary_piano_roll: Boolean note activity [88, T]
+        
+    Returns:
+        tuple: (pitches [N], start_times [N], end_times [N]), times in seconds
+    """
+    pitches, start_frames, end_frames = [], [], []
+    for key_idx in range(binary_piano_roll.shape[0]):
+        note_events = extract_note_events(binary_piano_roll[key_idx, :])
+        for start_frame, end_frame in note_events:
+            pitches.append(MIN_MIDI_NOTE + key_idx)
+            start_frames.append(start_frame)
+            end_frames.append(end_frame)
+    
+    pitches = np.asarray(pitches, dtype=np.int64)
+    start_times = np.asarray(start_frames, dtype=np.float64) * FRAME_DURATION
+    end_times = np.asarray(end_frames, dtype=np.float64) * FRAME_DURATION
+    return pitches, start_times, end_times
+
+
+def write_midi_notes(output_path: str,
+                     pitches: np.ndarray,
+                     start_times: np.ndarray,
+                     end_times: np.ndarray,
+                     velocity: int = 64,
+                     tempo: float = 120.0) -> None:
+    """
+    Write notes straight to a single-track MIDI file with mido
+    
+    Args:
+        output_path: Path to save MIDI file
+        pitches: MIDI pitch per note [N]
+        start_times: Note start times in seconds [N]
+        end_times: Note end times in seconds [N]
+        velocity: MIDI velocity for all notes
+        tempo: Tempo in BPM
+    """
+    ticks_per_second = TICKS_PER_BEAT * tempo / 60.0
+    start_ticks = np.round(np.asarray(start_times) * ticks_per_second).astype(np.int64)
+    end_ticks = np.round(np.asarray(end_times) * ticks_per_second).astype(np.int64)
+    pitches = np.asarray(pitches, dtype=np.int64)
+    
+    # One note_on and one note_off per note; note_offs sort first on tick ties
+    ticks = np.concatenate([end_ticks, start_ticks])
+    is_on = np.concatenate([np.zeros(len(end_ticks), dtype=np.int64),
+                            np.ones(len(start_ticks), dtype=np.int64)])
+    event_pitches = np.concatenate([pitches, pitches])
+    order = np.lexsort((event_pitches, is_on, ticks))
+    deltas = np.diff(ticks[order], prepend=0)
+    
+    track = mido.MidiTrack()
+    track.append(mido.MetaMessage('set_tempo', tempo=mido.bpm2tempo(tempo), time=0))
+    track.append(mido.Message('program_change', program=ACOUSTIC_GRAND_PIANO, time=0))
+    for on, pitch, delta in zip(is_on[order].tolist(), event_pitches[order].tolist(), deltas.tolist()):
+        track.append(mido.Message('note_on' if on else 'note_off',
+                                  note=pitch, velocity=velocity if on else 0, time=delta))
+    track.append(mido.MetaMessage('end_of_track', time=0))
+    
+    midi = mido.MidiFile(ticks_per_beat=TICKS_PER_BEAT)
+    midi.tracks.append(track)
+    midi.save(output_path)
+
+
 def extract_note_events(activations: np.ndarray, min_duration_frames: int = 3) -> list[tuple[int, int]]:
     """
     Extract note start/end events from binary activations
@@ -226,29 +322,34 @@ def analyze_predictions(predictions: torch.Tensor, threshold: float = 0.5) -> di
         if predictions.dim() == 3:
             predictions = predictions.squeeze(0)
             
-        probs = torch.sigmoid(predictions)
-        binary = (probs > threshold)
+        # Sigmoid once (in float32) and run every reduction on the same buffer
+        probs = torch.sigmoid(predictions.float())
+        min_prob, max_prob = torch.aminmax(probs)
+        mean_prob = probs.mean()
+        
+        # probs is no longer needed, so threshold it in place
+        binary = probs.gt_(threshold)
+        key_activity = binary.sum(dim=1)
         
         analysis = {
             'shape': tuple(predictions.shape),
             'total_frames': predictions.shape[1] if predictions.dim() == 2 else 0,
-            'duration_seconds': predictions.shape[1] * HOP_LENGTH / SAMPLE_RATE if predictions.dim() == 2 else 0,
-            'active_frames': binary.sum().item(),
-            'active_keys': (binary.sum(dim=1) > 0).sum().item(),
-            'max_prob': probs.max().item(),
-            'min_prob': probs.min().item(),
-            'mean_prob': probs.mean().item(),
+            'duration_seconds': predictions.shape[1] * FRAME_DURATION if predictions.dim() == 2 else 0,
+            'active_frames': int(key_activity.sum().item()),
+            'active_keys': (key_activity > 0).sum().item(),
+            'max_prob': max_prob.item(),
+            'min_prob': min_prob.item(),
+            'mean_prob': mean_prob.item(),
         }
         
         # Find most active keys
-        key_activity = binary.sum(dim=1)
         top_keys = torch.topk(key_activity, k=min(5, len(key_activity)))
         
         analysis['top_active_keys'] = [
             {
                 'key_index': idx.item(),
                 'midi_note': MIN_MIDI_NOTE + idx.item(),
-                'frames_active': count.item()
+                'frames_active': int(count.item())
             }
             for idx, count in zip(top_keys.indices, top_keys.values)
             if count > 0
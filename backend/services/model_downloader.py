@@ -14,6 +14,7 @@ class ModelDownloader:
     MODEL_URL = "https://github.com/KevinJasinghe/360_website/raw/main/final_model"
     MODEL_FILENAME = "final_model"
     EXPECTED_SIZE = None  # Size will be determined dynamically
+    DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1MB reads keep syscall/print overhead out of the loop
     
     @classmethod
     def get_model_path(cls):
@@ -58,17 +59,20 @@ class ModelDownloader:
             
             total_size = int(response.headers.get('content-length', 0))
             downloaded = 0
+            last_percent = -1
             
             with open(temp_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in response.raw.stream(cls.DOWNLOAD_CHUNK_SIZE, decode_content=True):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
                         
-                        # Show progress (less frequently to avoid log spam)
-                        if total_size > 0 and downloaded % (1024 * 1024) == 0:  # Every 1MB
-                            percent = (downloaded / total_size) * 100
-                            print(f"   Progress: {percent:.1f}% ({downloaded}/{total_size} bytes)")
+                        # Show progress only when the whole-percent value changes
+                        if total_size > 0:
+                            percent = int(downloaded * 100 / total_size)
+                            if percent != last_percent:
+                                last_percent = percent
+                                print(f"   Progress: {percent}% ({downloaded}/{total_size} bytes)")
             
             # Verify download
             actual_size = os.path.getsize(temp_path)
@@ -4,18 +4,325 @@ Uses music21 library to generate and export sheet music notation
 """
 
 import os
+import sqlite3
+import multiprocessing
 import tempfile
+import threading
+import functools
+import importlib.util
+import types
+import time
+import uuid
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
+# music21 takes seconds to import, so only check it is installed here and
+# import it the first time sheet music is actually generated (_get_music21)
+MUSIC21_AVAILABLE = importlib.util.find_spec('music21') is not None
+if not MUSIC21_AVAILABLE:
+    print("⚠️ music21 not available - sheet music conversion disabled")
+
+_M21 = None
+_M21_LOCK = threading.Lock()
+
+
+def _get_music21():
+    """Import music21 on first use and return the modules this file needs"""
+    global _M21
+    if _M21 is None:
+        with _M21_LOCK:
+            if _M21 is None:
+                from music21 import converter, stream, note, tempo, meter
+                from music21.musicxml import m21ToXml
+                _M21 = types.SimpleNamespace(converter=converter, stream=stream, note=note,
+                                             tempo=tempo, meter=meter, m21ToXml=m21ToXml)
+                print("✅ music21 loaded successfully")
+    return _M21
+
+# symusic parses MIDI in C++ and is used wherever a full music21 Stream isn't needed
 try:
-    from music21 import converter, stream, note, pitch, duration, tempo, meter
-    from music21.midi import MidiFile
-    from music21.musicxml import m21ToXml
-    MUSIC21_AVAILABLE = True
-    print("✅ music21 loaded successfully")
+    import symusic
+    SYMUSIC_AVAILABLE = True
+    print("✅ symusic loaded successfully")
 except ImportError:
-    MUSIC21_AVAILABLE = False
-    print("⚠️ music21 not available - sheet music conversion disabled")
+    SYMUSIC_AVAILABLE = False
+    print("⚠️ symusic not available - falling back to music21 for MIDI parsing")
+
+
+# Notes shorter than this (in quarter notes) are treated as AI prediction artifacts
+MIN_NOTE_QUARTER_LENGTH = 0.1
+
+# Allowed note lengths as multiples of the beat (32nd note up to dotted whole note)
+QUANTIZE_MULTIPLIERS = np.array([0.125, 0.1875, 0.25, 0.375, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0])
+# Onset grid in beats - same divisors music21's score.quantize was called with
+QUANTIZE_DIVISORS = (4, 3)
+QUANTIZE_EM_ITERATIONS = 10
+# A non-quarter beat guess must beat the quarter-note guess by this factor
+QUANTIZE_HYPOTHESIS_MARGIN = 0.8
+# MIDI resolution for quantized output; divisible by every grid step above
+QUANTIZED_TICKS_PER_QUARTER = 480
+# Rescaled tempos outside this range mean the beat estimate is off; keep the original timeline
+MIN_QUANTIZED_QPM = 40.0
+MAX_QUANTIZED_QPM = 240.0
+# Tempo assumed by MIDI when a file carries no tempo marking
+DEFAULT_QPM = 120.0
+
+
+def _load_score_fast(midi_file_path):
+    """
+    Parse a MIDI file with symusic (times in quarter notes)
+    
+    Results are cached in memory, keyed by path, mtime and size, so
+    repeated calls for the same file skip re-parsing. The
+    returned score is shared between callers - copy it before modifying.
+    
+    Args:
+        midi_file_path (str): Path to MIDI file
+        
+    Returns:
+        symusic.Score
+    """
+    file_stat = os.stat(midi_file_path)
+    return _load_score_cached(os.path.abspath(midi_file_path), file_stat.st_mtime_ns, file_stat.st_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_score_cached(midi_file_path, mtime_ns, size):
+    """Parse a symusic score; the mtime and size arguments only key the cache"""
+    return symusic.Score(midi_file_path, ttype="quarter")
+
+
+def _drop_short_notes(fast_score):
+    """
+    Return a copy of a symusic score without notes shorter than MIN_NOTE_QUARTER_LENGTH
+    
+    Filtering happens on symusic's numpy note arrays, so no per-note Python
+    objects are created.
+    """
+    fast_score = fast_score.copy()  # cached scores are shared
+    for track in fast_score.tracks:
+        notes = track.notes.numpy()
+        keep = notes['duration'] >= MIN_NOTE_QUARTER_LENGTH
+        if not keep.all():
+            track.notes = symusic.Note.from_numpy(
+                **{field: values[keep] for field, values in notes.items()}, ttype="quarter")
+    return fast_score
+
+
+# Worker processes for batch conversion, created on first use and kept alive.
+# Workers are spawned rather than forked so they don't inherit the web server's threads and locks.
+_conversion_pool = None
+_conversion_pool_lock = threading.Lock()
+
+
+def _get_conversion_pool(workers=None):
+    """Return the shared process pool used for batch MusicXML conversion"""
+    global _conversion_pool
+    with _conversion_pool_lock:
+        if _conversion_pool is None:
+            _conversion_pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                                   mp_context=multiprocessing.get_context('spawn'))
+        return _conversion_pool
+
+
+# Background conversion job state lives in SQLite so any gunicorn worker can answer a poll
+CONVERSION_JOBS_DB_PATH = os.path.join(tempfile.gettempdir(), 'sheet_music_jobs.sqlite3')
+CONVERSION_JOB_RETENTION_SECONDS = 3600
+
+
+def _jobs_db():
+    """Open the conversion job database, creating the table on first use"""
+    conn = sqlite3.connect(CONVERSION_JOBS_DB_PATH, timeout=5)
+    conn.execute('CREATE TABLE IF NOT EXISTS conversion_jobs '
+                 '(job_id TEXT PRIMARY KEY, status TEXT NOT NULL, output_path TEXT, '
+                 'message TEXT NOT NULL, updated_at REAL NOT NULL)')
+    return conn
+
+
+def _save_conversion_job(job_id, status, output_path, message):
+    """Record a job's state and forget jobs older than CONVERSION_JOB_RETENTION_SECONDS"""
+    now = time.time()
+    with closing(_jobs_db()) as conn, conn:
+        conn.execute('INSERT OR REPLACE INTO conversion_jobs (job_id, status, output_path, message, updated_at) '
+                     'VALUES (?, ?, ?, ?, ?)', (job_id, status, output_path, message, now))
+        conn.execute('DELETE FROM conversion_jobs WHERE updated_at < ?',
+                     (now - CONVERSION_JOB_RETENTION_SECONDS,))
+
+
+def _record_conversion_result(job_id, future):
+    """Done-callback for a queued conversion: persist its outcome"""
+    try:
+        success, output_path, message = future.result()
+        status = 'completed' if success else 'failed'
+    except Exception as e:
+        status, output_path, message = 'failed', None, f"Sheet music generation failed: {str(e)}"
+    
+    try:
+        _save_conversion_job(job_id, status, output_path, message)
+    except sqlite3.Error as e:
+        print(f"❌ Could not record sheet music job {job_id}: {e}")
+
+
+def _nearest_multipliers(durations, beat):
+    """E-step: snap each duration to the closest QUANTIZE_MULTIPLIERS * beat"""
+    distances = np.abs(durations[:, None] - QUANTIZE_MULTIPLIERS[None, :] * beat)
+    return QUANTIZE_MULTIPLIERS[np.argmin(distances, axis=1)]
+
+
+def _estimate_beat(durations):
+    """
+    Estimate the beat length of a set of note durations with EM
+    
+    The most common duration is tried as a quarter, an eighth and a half
+    note. For each guess the E-step snaps durations to multiples of the beat
+    and the M-step re-fits the beat by least squares. The guess with the
+    lowest squared error wins; the eighth and half guesses have to improve
+    on the quarter guess by QUANTIZE_HYPOTHESIS_MARGIN, since exact
+    multiples of a beat fit equally well at half or double the beat.
+    
+    Args:
+        durations (np.ndarray): Note durations in quarter notes
+        
+    Returns:
+        float: Beat length in quarter notes
+    """
+    counts, edges = np.histogram(durations, bins=32)
+    peak = int(np.argmax(counts))
+    dominant = 0.5 * (edges[peak] + edges[peak + 1])
+    
+    best_error, best_beat = np.inf, 1.0
+    for dominant_multiplier in (1.0, 0.5, 2.0):  # quarter / eighth / half
+        beat = dominant / dominant_multiplier
+        for _ in range(QUANTIZE_EM_ITERATIONS):
+            multipliers = _nearest_multipliers(durations, beat)
+            beat = float((durations * multipliers).sum() / (multipliers * multipliers).sum())
+        
+        multipliers = _nearest_multipliers(durations, beat)
+        error = ((durations - multipliers * beat) ** 2).sum()
+        if dominant_multiplier != 1.0:
+            error /= QUANTIZE_HYPOTHESIS_MARGIN
+        if error < best_error:
+            best_error, best_beat = error, beat
+    
+    return best_beat
+
+
+def _snap_onsets(onsets):
+    """Snap onsets (in beats) to the nearest point on any QUANTIZE_DIVISORS grid"""
+    candidates = np.stack([np.round(onsets * divisor) / divisor for divisor in QUANTIZE_DIVISORS])
+    nearest = np.argmin(np.abs(candidates - onsets[None, :]), axis=0)
+    return candidates[nearest, np.arange(len(onsets))]
+
+
+def _quantize_score(fast_score):
+    """
+    Quantize note onsets and durations of a symusic score in place
+    
+    Replaces music21's element-by-element score.quantize with a few numpy
+    passes. The timeline is rescaled so the estimated beat becomes one
+    quarter note (tempo markings are rescaled to match), onsets are snapped
+    to the 1/4 and 1/3 beat grids and durations to QUANTIZE_MULTIPLIERS.
+    If the rescaled tempo would leave MIN_QUANTIZED_QPM..MAX_QUANTIZED_QPM
+    the beat estimate is discarded and the timeline is kept as is.
+    A note whose snapped end falls just short of the next onset is extended
+    to meet it when the longer length is still a notatable multiplier, so
+    quantization does not leave spurious rests.
+    
+    Args:
+        fast_score: symusic.Score with ttype="quarter" (modified in place)
+    """
+    note_arrays = [track.notes.numpy() for track in fast_score.tracks]
+    durations = np.concatenate([notes['duration'] for notes in note_arrays] or [np.empty(0)])
+    durations = durations[durations > 0].astype(np.float64)
+    if len(durations) == 0:
+        return
+    
+    beat = _estimate_beat(durations)
+    tempos = np.array([tempo_event.qpm for tempo_event in fast_score.tempos] or [DEFAULT_QPM]) / beat
+    if tempos.min() < MIN_QUANTIZED_QPM or tempos.max() > MAX_QUANTIZED_QPM:
+        beat = 1.0
+    min_grid_step = 1.0 / max(QUANTIZE_DIVISORS)
+    
+    for track, notes in zip(fast_score.tracks, note_arrays):
+        if len(notes['time']) == 0:
+            continue
+        
+        onsets = _snap_onsets(notes['time'] / beat)
+        snapped_durations = _nearest_multipliers(notes['duration'] / beat, 1.0)
+        
+        # Round note ends up to the next onset when that closes a small gap
+        unique_onsets = np.unique(onsets)
+        next_index = np.searchsorted(unique_onsets, onsets, side='right')
+        has_next = next_index < len(unique_onsets)
+        next_onsets = np.where(has_next, unique_onsets[np.minimum(next_index, len(unique_onsets) - 1)], np.inf)
+        gaps = next_onsets - (onsets + snapped_durations)
+        gap_closing_durations = next_onsets - onsets
+        notatable = np.isclose(gap_closing_durations[:, None], QUANTIZE_MULTIPLIERS[None, :]).any(axis=1)
+        close_gap = (gaps > 0) & (gaps <= min_grid_step) & notatable
+        snapped_durations = np.where(close_gap, gap_closing_durations, snapped_durations)
+        
+        track.notes = symusic.Note.from_numpy(
+            time=onsets.astype(np.float32),
+            duration=snapped_durations.astype(np.float32),
+            pitch=notes['pitch'],
+            velocity=notes['velocity'],
+            ttype="quarter")
+    
+    # Keep tempo, meter and key markings aligned with the rescaled timeline
+    for tempo_event in fast_score.tempos:
+        tempo_event.time = tempo_event.time / beat
+        tempo_event.qpm = tempo_event.qpm / beat
+    for event in list(fast_score.time_signatures) + list(fast_score.key_signatures):
+        event.time = event.time / beat
+    
+    # Make sure every grid position maps onto a whole MIDI tick
+    fast_score.ticks_per_quarter = QUANTIZED_TICKS_PER_QUARTER
+
+
+def _describe_key_signature(key_signature):
+    """Format a symusic KeySignature as readable text"""
+    sharps = key_signature.key
+    if sharps == 0:
+        accidentals = "no sharps or flats"
+    else:
+        name = 'sharp' if sharps > 0 else 'flat'
+        accidentals = f"{abs(sharps)} {name}{'s' if abs(sharps) > 1 else ''}"
+    mode = 'minor' if key_signature.tonality else 'major'
+    return f"{accidentals} ({mode})"
+
+
+@functools.lru_cache(maxsize=None)
+def _build_test_musicxml():
+    """
+    Build the fixed C major test score once and return its MusicXML bytes
+    
+    The test score never changes, so later calls just reuse the serialized bytes.
+    """
+    m21 = _get_music21()
+    score = m21.stream.Score()
+    part = m21.stream.Part()
+    
+    # Add time signature and key signature
+    part.append(m21.meter.TimeSignature('4/4'))
+    part.append(m21.tempo.TempoIndication(number=120))
+    
+    # Add a simple melody (C major scale)
+    notes_data = [
+        ('C4', 1.0), ('D4', 1.0), ('E4', 1.0), ('F4', 1.0),
+        ('G4', 1.0), ('A4', 1.0), ('B4', 1.0), ('C5', 2.0)
+    ]
+    
+    for note_name, duration_val in notes_data:
+        n = m21.note.Note(note_name)
+        n.duration.quarterLength = duration_val
+        part.append(n)
+    
+    score.append(part)
+    return bytes(m21.m21ToXml.GeneralObjectExporter(score).parse())
+
 
 class SheetMusicGenerator:
     """Generate sheet music from MIDI files using music21"""
@@ -42,39 +349,140 @@ class SheetMusicGenerator:
         
         try:
             # Check if MIDI file exists
-            if not os.path.exists(midi_file_path):
+            try:
+                os.stat(midi_file_path)
+            except FileNotFoundError:
                 return False, None, f"MIDI file not found: {midi_file_path}"
             
             print(f"🎼 Converting MIDI to sheet music: {Path(midi_file_path).name}")
             
             # Load MIDI file
-            score = converter.parse(midi_file_path)
+            score, prefiltered = SheetMusicGenerator._parse_for_display(midi_file_path)
             
             if score is None:
                 return False, None, "Failed to parse MIDI file"
             
             # Clean up the score for better sheet music display
-            score = SheetMusicGenerator._clean_score_for_display(score)
+            score = SheetMusicGenerator._clean_score_for_display(
+                score, prefiltered=prefiltered)
             
             # Set output path if not provided
             if output_path is None:
                 base_name = Path(midi_file_path).stem
                 output_path = str(Path(midi_file_path).parent / f"{base_name}_sheet.xml")
             
-            # Export to MusicXML
-            score.write('musicxml', fp=output_path)
-            
-            # Verify the file was created
-            if os.path.exists(output_path):
-                file_size = os.path.getsize(output_path)
-                return True, output_path, f"Sheet music generated successfully ({file_size} bytes)"
-            else:
-                return False, None, "Failed to write MusicXML file"
+            return SheetMusicGenerator._write_musicxml(score, output_path)
                 
         except Exception as e:
             print(f"❌ Sheet music generation error: {e}")
             return False, None, f"Sheet music generation failed: {str(e)}"
     
+    @staticmethod
+    def batch_midi_to_musicxml(midi_file_paths, output_paths=None, workers=None):
+        """
+        Convert several MIDI files to MusicXML in parallel worker processes
+        
+        music21 export is pure-Python and CPU bound, so processes (not threads)
+        are used. The pool is created on the first call and reused afterwards;
+        workers only takes effect for that first call.
+        
+        Args:
+            midi_file_paths (list): Paths to MIDI files
+            output_paths (list): Paths to save MusicXML files (optional, None entries allowed)
+            workers (int): Number of worker processes (defaults to CPU count)
+            
+        Returns:
+            list: (success: bool, output_path: str, message: str) per input, in order
+        """
+        midi_file_paths = list(midi_file_paths)
+        if output_paths is None:
+            output_paths = [None] * len(midi_file_paths)
+        
+        if not MUSIC21_AVAILABLE:
+            return [(False, None, "music21 library not available")] * len(midi_file_paths)
+        
+        try:
+            pool = _get_conversion_pool(workers)
+            return list(pool.map(SheetMusicGenerator.midi_to_musicxml, midi_file_paths, output_paths))
+        except Exception as e:
+            print(f"❌ Batch sheet music generation error: {e}")
+            return [(False, None, f"Sheet music generation failed: {str(e)}")] * len(midi_file_paths)
+    
+    @staticmethod
+    def submit_conversion(midi_file_path, output_format='musicxml', output_path=None):
+        """
+        Queue a MIDI to sheet music conversion on the shared worker pool
+        
+        Returns immediately so the calling request isn't blocked on music21;
+        poll get_conversion_status with the returned job ID.
+        
+        Args:
+            midi_file_path (str): Path to MIDI file
+            output_format (str): 'musicxml' or 'png'
+            output_path (str): Path to save the output file (optional)
+            
+        Returns:
+            str: Job ID
+        """
+        convert = SheetMusicGenerator.midi_to_png if output_format == 'png' else SheetMusicGenerator.midi_to_musicxml
+        job_id = uuid.uuid4().hex
+        _save_conversion_job(job_id, 'processing', None, 'Conversion in progress')
+        
+        future = _get_conversion_pool().submit(convert, midi_file_path, output_path)
+        future.add_done_callback(functools.partial(_record_conversion_result, job_id))
+        
+        print(f"📋 Queued sheet music job {job_id}: {Path(midi_file_path).name}")
+        return job_id
+    
+    @staticmethod
+    def get_conversion_status(job_id):
+        """
+        Get the status of a conversion queued with submit_conversion
+        
+        Job state is read from CONVERSION_JOBS_DB_PATH, so the poll may be
+        served by a different worker process than the one that queued it.
+        
+        Args:
+            job_id (str): Job ID returned by submit_conversion
+            
+        Returns:
+            dict: Job status ('processing', 'completed' or 'failed') or None if unknown
+        """
+        try:
+            with closing(_jobs_db()) as conn:
+                row = conn.execute('SELECT status, output_path, message FROM conversion_jobs WHERE job_id = ?',
+                                   (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"❌ Could not read sheet music job {job_id}: {e}")
+            return None
+        
+        if row is None:
+            return None
+        
+        status, output_path, message = row
+        return {'status': status, 'output_path': output_path, 'message': message}
+    
+    @staticmethod
+    def _write_musicxml(score, output_path):
+        """
+        Export an already parsed and cleaned music21 score to MusicXML
+        
+        Args:
+            score: music21 Score object
+            output_path (str): Path to save MusicXML file
+            
+        Returns:
+            tuple: (success: bool, output_path: str, message: str)
+        """
+        score.write('musicxml', fp=output_path)
+        
+        # Verify the file was created (one stat gives both existence and size)
+        try:
+            file_size = os.stat(output_path).st_size
+        except FileNotFoundError:
+            return False, None, "Failed to write MusicXML file"
+        return True, output_path, f"Sheet music generated successfully ({file_size} bytes)"
+    
     @staticmethod
     def midi_to_png(midi_file_path, output_path=None):
         """
@@ -92,19 +500,22 @@ class SheetMusicGenerator:
         
         try:
             # Check if MIDI file exists
-            if not os.path.exists(midi_file_path):
+            try:
+                os.stat(midi_file_path)
+            except FileNotFoundError:
                 return False, None, f"MIDI file not found: {midi_file_path}"
             
             print(f"🖼️ Converting MIDI to PNG sheet music: {Path(midi_file_path).name}")
             
             # Load MIDI file
-            score = converter.parse(midi_file_path)
+            score, prefiltered = SheetMusicGenerator._parse_for_display(midi_file_path)
             
             if score is None:
                 return False, None, "Failed to parse MIDI file"
             
             # Clean up the score for better sheet music display
-            score = SheetMusicGenerator._clean_score_for_display(score)
+            score = SheetMusicGenerator._clean_score_for_display(
+                score, prefiltered=prefiltered)
             
             # Set output path if not provided
             if output_path is None:
@@ -116,28 +527,53 @@ class SheetMusicGenerator:
                 score.write('png', fp=output_path)
                 
                 # Verify the file was created
-                if os.path.exists(output_path):
-                    file_size = os.path.getsize(output_path)
-                    return True, output_path, f"Sheet music PNG generated successfully ({file_size} bytes)"
-                else:
+                try:
+                    file_size = os.stat(output_path).st_size
+                except FileNotFoundError:
                     return False, None, "Failed to write PNG file"
+                return True, output_path, f"Sheet music PNG generated successfully ({file_size} bytes)"
                     
             except Exception as png_error:
                 # PNG export might not work without additional tools, fallback to MusicXML
+                # using the score we already parsed and cleaned
                 print(f"⚠️ PNG export failed ({png_error}), generating MusicXML instead")
-                return SheetMusicGenerator.midi_to_musicxml(midi_file_path, output_path.replace('.png', '.xml'))
+                return SheetMusicGenerator._write_musicxml(score, output_path.replace('.png', '.xml'))
                 
         except Exception as e:
             print(f"❌ Sheet music PNG generation error: {e}")
             return False, None, f"Sheet music generation failed: {str(e)}"
     
     @staticmethod
-    def _clean_score_for_display(score):
+    def _parse_for_display(midi_file_path):
+        """
+        Parse a MIDI file into a music21 score for sheet music export
+        
+        With symusic available, very short notes are dropped and the notes are
+        quantized on numpy arrays before music21 ever sees them, and music21
+        parses the prepared MIDI from memory without its own quantization.
+        
+        Args:
+            midi_file_path (str): Path to MIDI file
+            
+        Returns:
+            tuple: (music21 Score or None, prefiltered: bool)
+        """
+        if SYMUSIC_AVAILABLE:
+            fast_score = _drop_short_notes(_load_score_fast(midi_file_path))
+            _quantize_score(fast_score)
+            return _get_music21().converter.parse(fast_score.dumps_midi(), format='midi', quantizePost=False), True
+        
+        return _get_music21().converter.parse(midi_file_path), False
+    
+    @staticmethod
+    def _clean_score_for_display(score, prefiltered=False):
         """
         Clean and optimize the score for better sheet music display
         
         Args:
             score: music21 Score object
+            prefiltered (bool): True if very short notes were already removed
+                and durations quantized before parsing
             
         Returns:
             Cleaned score object
@@ -145,24 +581,18 @@ class SheetMusicGenerator:
         try:
             # Set tempo if not present
             if not score.metronomeMarkBoundaries():
-                score.insert(0, tempo.TempoIndication(number=120))
+                score.insert(0, _get_music21().tempo.TempoIndication(number=120))
             
             # Set time signature if not present
             if not score.getTimeSignatures():
-                score.insert(0, meter.TimeSignature('4/4'))
-            
-            # Clean up very short notes (artifacts from AI prediction)
-            for part in score.parts:
-                notes_to_remove = []
-                for element in part.flat.notes:
-                    if hasattr(element, 'duration') and element.duration.quarterLength < 0.1:
-                        notes_to_remove.append(element)
-                
-                for note_to_remove in notes_to_remove:
-                    part.remove(note_to_remove)
+                score.insert(0, _get_music21().meter.TimeSignature('4/4'))
             
-            # Quantize note durations to standard values
-            score.quantize(quarterLengthDivisors=[4, 3], processOffsets=True, processDurations=True)
+            if not prefiltered:
+                # Clean up very short notes (artifacts from AI prediction)
+                SheetMusicGenerator._remove_short_notes(score)
+                
+                # Quantize note durations to standard values
+                score.quantize(quarterLengthDivisors=[4, 3], processOffsets=True, processDurations=True)
             
             return score
             
@@ -170,6 +600,27 @@ class SheetMusicGenerator:
             print(f"⚠️ Score cleaning warning: {e}")
             return score  # Return original score if cleaning fails
     
+    @staticmethod
+    def _remove_short_notes(score):
+        """
+        Remove notes shorter than MIN_NOTE_QUARTER_LENGTH from a music21 score
+        
+        Short notes are collected in one pass and removed from the measure
+        (or part) that directly contains them, so each removal only scans
+        that container instead of the whole part.
+        
+        Args:
+            score: music21 Score object (modified in place)
+        """
+        short_notes_by_container = {}
+        for element in score.recurse().notes:
+            if element.duration.quarterLength < MIN_NOTE_QUARTER_LENGTH:
+                container = element.activeSite
+                short_notes_by_container.setdefault(id(container), (container, []))[1].append(element)
+        
+        for container, short_notes in short_notes_by_container.values():
+            container.remove(short_notes)
+    
     @staticmethod
     def get_score_info(midi_file_path):
         """
@@ -181,38 +632,81 @@ class SheetMusicGenerator:
         Returns:
             dict: Score information or None if error
         """
-        if not MUSIC21_AVAILABLE:
+        if not MUSIC21_AVAILABLE and not SYMUSIC_AVAILABLE:
             return None
         
+        if SYMUSIC_AVAILABLE:
+            return SheetMusicGenerator._get_score_info_fast(midi_file_path)
+        
         try:
-            score = converter.parse(midi_file_path)
+            score = _get_music21().converter.parse(midi_file_path)
             if score is None:
                 return None
             
+            # Flatten once and reuse it for every lookup below
+            flat = score.flatten()
+            
             # Extract basic information
             info = {
                 'duration_seconds': float(score.duration.quarterLength) * 0.5,  # Approximate at 120 BPM
                 'num_parts': len(score.parts),
-                'num_notes': sum(len(part.flat.notes) for part in score.parts),
+                'num_notes': len(flat.notes),
                 'key_signature': None,
                 'time_signature': None,
                 'tempo': None
             }
             
-            # Get key signature
-            key_sigs = score.flatten().getElementsByClass('KeySignature')
-            if key_sigs:
-                info['key_signature'] = str(key_sigs[0])
+            # Get the first key signature, time signature and tempo in a single pass
+            for element in flat.getElementsByClass(['KeySignature', 'TimeSignature', 'TempoIndication']):
+                classes = element.classSet
+                if info['key_signature'] is None and 'KeySignature' in classes:
+                    info['key_signature'] = str(element)
+                elif info['time_signature'] is None and 'TimeSignature' in classes:
+                    info['time_signature'] = str(element)
+                elif info['tempo'] is None and 'TempoIndication' in classes:
+                    info['tempo'] = element.number
+                
+                if None not in (info['key_signature'], info['time_signature'], info['tempo']):
+                    break
             
-            # Get time signature
-            time_sigs = score.flatten().getElementsByClass('TimeSignature')
-            if time_sigs:
-                info['time_signature'] = str(time_sigs[0])
+            return info
             
-            # Get tempo
-            tempos = score.flatten().getElementsByClass('TempoIndication')
-            if tempos:
-                info['tempo'] = tempos[0].number
+        except Exception as e:
+            print(f"❌ Score info extraction error: {e}")
+            return None
+    
+    @staticmethod
+    def _get_score_info_fast(midi_file_path):
+        """
+        Get MIDI score information from symusic without building a music21 Stream
+        
+        Args:
+            midi_file_path (str): Path to MIDI file
+            
+        Returns:
+            dict: Score information or None if error
+        """
+        try:
+            score = _load_score_fast(midi_file_path)
+            
+            info = {
+                'duration_seconds': float(score.end()) * 0.5,  # Approximate at 120 BPM
+                'num_parts': len(score.tracks),
+                'num_notes': sum(len(track.notes) for track in score.tracks),
+                'key_signature': None,
+                'time_signature': None,
+                'tempo': None
+            }
+            
+            if len(score.key_signatures):
+                info['key_signature'] = _describe_key_signature(score.key_signatures[0])
+            
+            if len(score.time_signatures):
+                time_sig = score.time_signatures[0]
+                info['time_signature'] = f"{time_sig.numerator}/{time_sig.denominator}"
+            
+            if len(score.tempos):
+                info['tempo'] = float(score.tempos[0].qpm)
             
             return info
             
@@ -235,34 +729,10 @@ class SheetMusicGenerator:
             return False, "music21 library not available"
         
         try:
-            # Create a simple test score
-            score = stream.Score()
-            part = stream.Part()
-            
-            # Add time signature and key signature
-            part.append(meter.TimeSignature('4/4'))
-            part.append(tempo.TempoIndication(number=120))
-            
-            # Add a simple melody (C major scale)
-            notes_data = [
-                ('C4', 1.0), ('D4', 1.0), ('E4', 1.0), ('F4', 1.0),
-                ('G4', 1.0), ('A4', 1.0), ('B4', 1.0), ('C5', 2.0)
-            ]
-            
-            for note_name, duration_val in notes_data:
-                n = note.Note(note_name)
-                n.duration.quarterLength = duration_val
-                part.append(n)
-            
-            score.append(part)
-            
-            # Export to MusicXML
-            score.write('musicxml', fp=output_path)
-            
-            if os.path.exists(output_path):
-                return True, "Test sheet music created successfully"
-            else:
-                return False, "Failed to create test sheet music file"
+            with open(output_path, 'wb') as f:
+                f.write(_build_test_musicxml())
+            
+            return True, "Test sheet music created successfully"
                 
         except Exception as e:
             return False, f"Test sheet music creation failed: {str(e)}"
@@ -287,12 +757,16 @@ def validate_midi_for_sheet_music(midi_file_path):
     
     try:
         # Quick parse test
-        score = converter.parse(midi_file_path)
-        if score is None:
-            return False, "MIDI file could not be parsed"
+        if SYMUSIC_AVAILABLE:
+            score = _load_score_fast(midi_file_path)
+            total_notes = sum(len(track.notes) for track in score.tracks)
+        else:
+            score = _get_music21().converter.parse(midi_file_path)
+            if score is None:
+                return False, "MIDI file could not be parsed"
+            total_notes = sum(len(part.flat.notes) for part in score.parts)
         
         # Check if it has any musical content
-        total_notes = sum(len(part.flat.notes) for part in score.parts)
         if total_notes == 0:
             return False, "MIDI file contains no notes"
         
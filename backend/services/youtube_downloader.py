@@ -1,50 +1,630 @@
-import yt_dlp
+"""
+YouTube audio download and metadata lookup
+Tries pytubefix first, then a prioritized list of yt-dlp client strategies, then the yt-dlp CLI
+"""
+
 import os
 import re
+import importlib.util
 from urllib.parse import urlparse, parse_qs
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import subprocess
 import json
+import sqlite3
 import tempfile
+import shutil
+import stat
+import time
+import random
+import asyncio
+import atexit
+import collections
+import threading
+import logging
+from types import MappingProxyType, SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+# yt_dlp and pytubefix load large extractor registries, so both are imported on first use
+# rather than at import time (requests that never touch YouTube don't pay for them)
+PYTUBEFIX_AVAILABLE = importlib.util.find_spec('pytubefix') is not None
+if not PYTUBEFIX_AVAILABLE:
+    logger.warning("⚠️ PytubeFixed not available - will use yt-dlp only")
+
+_YT_DLP = None
+_PYTUBEFIX = None
+_IMPORT_LOCK = threading.Lock()
+
+
+def _yt_dlp():
+    """Import yt_dlp on first use and return the module"""
+    global _YT_DLP
+    if _YT_DLP is None:
+        with _IMPORT_LOCK:
+            if _YT_DLP is None:
+                import yt_dlp
+                _YT_DLP = yt_dlp
+    return _YT_DLP
+
+
+def _pytubefix():
+    """Import pytubefix on first use and return the names this file needs"""
+    global _PYTUBEFIX
+    if _PYTUBEFIX is None:
+        with _IMPORT_LOCK:
+            if _PYTUBEFIX is None:
+                from pytubefix import YouTube
+                from pytubefix.exceptions import VideoUnavailable, PytubeFixError
+                _PYTUBEFIX = SimpleNamespace(YouTube=YouTube, VideoUnavailable=VideoUnavailable,
+                                             PytubeFixError=PytubeFixError)
+                logger.info("✅ PytubeFixed loaded successfully")
+    return _PYTUBEFIX
+
+
+__all__ = ['YouTubeDownloader']
+
+# URL patterns compiled once at import, each fused into a single alternation
+_YT_URL_RE = re.compile(r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/.*[?&]v=)')
+_YT_ID_RE = re.compile(r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/v/)([^&\n?#]+)')
+# A real video ID; anything else (e.g. url-decoded '../..') never reaches cache paths
+_VIDEO_ID_RE = re.compile(r'[A-Za-z0-9_-]{11}')
+
+# Directories downloads may be written to, resolved once at import
+_ALLOWED_ROOTS = tuple(os.path.realpath(path) for path in (
+    '/tmp', os.getcwd(), os.path.abspath('../uploads'), os.path.abspath('./uploads')
+))
+# Separator-terminated so '/tmp' doesn't also admit '/tmpfoo'; checked with one str.startswith
+_ALLOWED_PREFIXES = tuple(os.path.join(root, '') for root in _ALLOWED_ROOTS)
+
+# Extensions a download can end up with, most preferred first
+_DOWNLOAD_EXTENSION_RANK = {extension: rank for rank, extension in enumerate(('webm', 'm4a', 'mp4', 'opus', 'wav'))}
+
+# Drops characters that are invalid in filenames and turns spaces into underscores
+_FILENAME_TRANSLATION = str.maketrans({**{char: None for char in '<>:"/\\|?*'}, ' ': '_'})
+
+
+def _output_base(output_path):
+    """output_path without its .wav suffix: the base every downloaded <base>.<ext> file shares"""
+    return output_path[:-len('.wav')] if output_path.endswith('.wav') else output_path
+
+
+# Per-strategy [successes, attempts], used to try the historically most reliable strategy first.
+# Counts are halved once attempts reach STRATEGY_STATS_DECAY_AT so we notice when YouTube
+# rotates what it blocks, and a small share of calls keeps the default order to re-test
+# demoted strategies.
+STRATEGY_STATS_PATH = os.path.join(tempfile.gettempdir(), 'yt_strategy_stats.json')
+STRATEGY_STATS_DECAY_AT = 200
+STRATEGY_EXPLORE_RATE = 0.05
+_STRATEGY_STATS = collections.defaultdict(lambda: [0, 0])
+_STRATEGY_STATS_LOCK = threading.Lock()
 
-# Import pytubefix as primary alternative
 try:
-    from pytubefix import YouTube as PytubeFixYouTube
-    from pytubefix.exceptions import VideoUnavailable, PytubeFixError
-    PYTUBEFIX_AVAILABLE = True
-    print("✅ PytubeFixed loaded successfully")
-except ImportError:
-    PYTUBEFIX_AVAILABLE = False
-    print("⚠️ PytubeFixed not available - will use yt-dlp only")
+    with open(STRATEGY_STATS_PATH) as stats_file:
+        for name, counts in json.load(stats_file).items():
+            _STRATEGY_STATS[name] = [int(counts[0]), int(counts[1])]
+except (OSError, ValueError, TypeError, IndexError):
+    pass
+
+# Player clients YouTube rejected (403, bot check, bad player response): client -> monotonic expiry
+CLIENT_BLOCK_SECONDS = 300
+_BLOCKED_CLIENTS = {}
+_CLIENT_BLOCKED_RE = re.compile(r"HTTP Error 403|confirm you.re not a bot|player response", re.IGNORECASE)
+
+
+def _strategy_client(strategy):
+    """The YouTube player client a strategy impersonates (pytubefix counts as its own client)"""
+    return strategy.get('extractor_args', {}).get('youtube', {}).get('player_client', [strategy['name']])[0]
+
+
+def _prioritize_strategies(strategies):
+    """
+    Order strategies by Laplace-smoothed success rate (ties keep their table order),
+    leaving out clients YouTube is currently blocking unless that would leave none
+    """
+    now = time.monotonic()
+    usable = [strategy for strategy in strategies if _BLOCKED_CLIENTS.get(_strategy_client(strategy), 0) <= now]
+    strategies = usable or list(strategies)
+    if random.random() < STRATEGY_EXPLORE_RATE:
+        return strategies
+    with _STRATEGY_STATS_LOCK:
+        rates = {name: (successes + 1) / (attempts + 2) for name, (successes, attempts) in _STRATEGY_STATS.items()}
+    return sorted(strategies, key=lambda strategy: -rates.get(strategy['name'], 0.5))
+
+
+def _record_strategy(strategy, succeeded, error=None):
+    """Count one finished attempt of a strategy, and note its client if YouTube blocked it"""
+    name = strategy['name']
+    with _STRATEGY_STATS_LOCK:
+        counts = _STRATEGY_STATS[name]
+        counts[0] += bool(succeeded)
+        counts[1] += 1
+        if counts[1] >= STRATEGY_STATS_DECAY_AT:
+            counts[0] //= 2
+            counts[1] //= 2
+    if error is not None and _CLIENT_BLOCKED_RE.search(str(error)):
+        _BLOCKED_CLIENTS[_strategy_client(strategy)] = time.monotonic() + CLIENT_BLOCK_SECONDS
+        logger.warning(f"⚠️ Skipping {_strategy_client(strategy)} clients for {CLIENT_BLOCK_SECONDS}s")
+
+
+@atexit.register
+def _save_strategy_stats():
+    """Persist strategy stats so a restarted worker keeps its ordering"""
+    try:
+        with _STRATEGY_STATS_LOCK:
+            stats = dict(_STRATEGY_STATS)
+        with open(STRATEGY_STATS_PATH, 'w') as stats_file:
+            json.dump(stats, stats_file)
+    except OSError:
+        pass
+
+
+# YoutubeDL instances kept alive across requests so their HTTP session, cookies and
+# extractor setup are reused; each comes with a lock since YoutubeDL isn't thread-safe
+_YDL_POOL = {}
+_YDL_POOL_LOCK = threading.Lock()
+
+
+def _get_ydl(ydl_opts, key=None):
+    """Return a pooled (YoutubeDL, lock) pair for these options (or key), creating it on first use"""
+    if key is None:
+        key = json.dumps(ydl_opts, sort_keys=True, default=repr)
+    with _YDL_POOL_LOCK:
+        if key not in _YDL_POOL:
+            _YDL_POOL[key] = (_yt_dlp().YoutubeDL(ydl_opts), threading.Lock())
+        return _YDL_POOL[key]
+
+
+@atexit.register
+def _close_ydl_pool():
+    for ydl, _ in _YDL_POOL.values():
+        ydl.close()
+
+
+# yt-dlp client strategies live in a data file so they can be tuned without code changes;
+# YT_STRATEGIES_PATH points at an alternative file
+STRATEGIES_PATH = os.environ.get('YT_STRATEGIES_PATH',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), 'youtube_strategies.json'))
+
+
+def _make_strategy(name, player_client, player_skip, user_agent, headers=None, youtube_args=None):
+    """Build one read-only yt-dlp client strategy (extractor args plus request headers)"""
+    return MappingProxyType({
+        'name': name,
+        'extractor_args': {
+            'youtube': {'player_client': [player_client], 'player_skip': list(player_skip), **(youtube_args or {})}
+        },
+        'http_headers': {'User-Agent': user_agent, 'Accept': '*/*', **(headers or {})}
+    })
+
+
+def _load_strategies(path):
+    """
+    Read the info and download strategy tables from a strategies JSON file
+    
+    Download strategies are the info clients plus a format selector, with
+    per-strategy overrides (e.g. a different name or format) applied on top.
+    
+    Returns:
+        tuple: (info strategies, download strategies), each a tuple of read-only mappings
+    """
+    with open(path) as strategies_file:
+        config = json.load(strategies_file)
+    
+    info_strategies = tuple(_make_strategy(**entry) for entry in config['info'])
+    overrides = config.get('download_overrides', {})
+    download_strategies = tuple(
+        MappingProxyType({**strategy, 'format': config['download_format'], **overrides.get(strategy['name'], {})})
+        for strategy in info_strategies
+    )
+    return info_strategies, download_strategies
+
+
+# Strategies for getting video info and for downloading audio, tried in order to avoid
+# bot detection - Production-optimized Aug 2025
+_INFO_STRATEGIES, _DOWNLOAD_STRATEGIES = _load_strategies(STRATEGIES_PATH)
+
+# The CLI-style fallbacks run in-process unless YTDL_USE_CLI=1 (debugging only)
+YTDL_USE_CLI = os.environ.get('YTDL_USE_CLI') == '1'
+_CLI_HTTP_HEADERS = {
+    'info': {
+        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15',
+        'Accept': '*/*',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': 'https://www.youtube.com/'
+    },
+    'download': {
+        'User-Agent': 'com.google.ios.youtubemusic/6.42.52 (iPhone14,3; U; CPU iOS 15_6 like Mac OS X)',
+        'Accept': '*/*',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': 'https://www.youtube.com/'
+    }
+}
+
+# The yt-dlp executable runs at lower CPU priority (via nice, when available) so it can't
+# starve the web workers; async callers should go through download_audio_async instead
+_NICE_PREFIX = ('nice', '-n', '10') if shutil.which('nice') else ()
+
+
+def _run_cli(cmd, timeout):
+    """Run a yt-dlp command at reduced priority and return the CompletedProcess"""
+    return subprocess.run([*_NICE_PREFIX, *cmd], capture_output=True, text=True, timeout=timeout)
+
+
+# aria2c, when installed, opens several HTTP ranges per file for faster downloads
+ARIA2C_PATH = shutil.which('aria2c')
+
+# Wall-clock budget (seconds) for trying strategies in one lookup or download, so a
+# YouTube outage costs callers this long instead of every strategy's timeouts in turn
+STRATEGY_TIME_BUDGET = 30
+
+# Strategies race on a shared thread pool, a few at a time per lookup or download
+INFO_STRATEGY_RACE_WIDTH = 3
+DOWNLOAD_PROBE_RACE_WIDTH = 2
+_STRATEGY_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='yt-strategy')
+
+# pytubefix takes part in the info race as one more strategy
+_PYTUBEFIX_STRATEGY = MappingProxyType({'name': 'pytubefix'})
+
+
+def _extract_info_with_strategy(url, strategy):
+    """Fetch video metadata with one strategy, raising on failure"""
+    if strategy is _PYTUBEFIX_STRATEGY:
+        info, error = YouTubeDownloader.get_video_info_pytubefix(url)
+        if info is None:
+            raise RuntimeError(error)
+        return info
+    
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extractor_args': strategy['extractor_args'],
+        'http_headers': strategy['http_headers'],
+        'socket_timeout': 10,
+        'retries': 0,  # No retries per strategy to fail fast
+        'fragment_retries': 0,
+        'skip_unavailable_fragments': True,
+        'geo_bypass': True,
+        'extract_flat': 'in_playlist'
+    }
+    
+    # process=False returns the extractor's metadata as-is, skipping
+    # format selection and the rest of the processing we don't need here
+    ydl, ydl_lock = _get_ydl(ydl_opts, key=('info', strategy['name']))
+    with ydl_lock:
+        return ydl.extract_info(url, download=False, process=False)
+
+
+def _download_options(strategy, output_path, max_duration):
+    """yt-dlp options for downloading output_path's audio with one strategy"""
+    ydl_opts = {
+        'format': strategy['format'],
+        'outtmpl': _output_base(output_path) + '.%(ext)s',
+        'noplaylist': True,
+        'quiet': True,  # Reduce noise for multiple attempts
+        'no_warnings': True,
+        'extract_flat': False,
+        'socket_timeout': 15,
+        'retries': 0,  # No retries per strategy to fail fast
+        'fragment_retries': 0,
+        'skip_unavailable_fragments': True,
+        'geo_bypass': True,
+        'extractor_args': strategy['extractor_args'],
+        'http_headers': {**strategy['http_headers'], 'Connection': 'keep-alive'},
+        # YouTube throttles per connection, so fetch DASH fragments in parallel and
+        # request progressive streams in ranged chunks
+        'concurrent_fragment_downloads': 5,
+        'http_chunk_size': 10 * 1024 * 1024,
+        # Security: duration limit is checked on the extracted metadata,
+        # before any media is fetched, instead of a separate info request
+        'match_filter': _yt_dlp().utils.match_filter_func(f'duration <=? {max_duration}'),
+        'break_on_reject': True
+    }
+    if ARIA2C_PATH:
+        ydl_opts['external_downloader'] = {'default': 'aria2c'}
+        ydl_opts['external_downloader_args'] = {'aria2c': ['-x', '8', '-s', '8', '-k', '1M']}
+    return ydl_opts
+
+
+def _finished_file_hook(downloaded):
+    """Progress hook that records the file yt-dlp finished writing as downloaded['path']"""
+    def hook(status):
+        if status.get('status') == 'finished':
+            downloaded['path'] = status.get('filename')
+    return hook
+
+
+def _probe_download_strategy(url, strategy, max_duration):
+    """Resolve formats for a download with one strategy without fetching any media"""
+    # Probes never write files, so one pooled instance per (strategy, duration limit) serves
+    # every output path and keeps its connections and cookies between downloads
+    ydl_opts = _download_options(strategy, '', max_duration)
+    del ydl_opts['outtmpl']
+    ydl, ydl_lock = _get_ydl(ydl_opts, key=('probe', strategy['name'], max_duration))
+    with ydl_lock:
+        return ydl.extract_info(url, download=False)
+
+# Limit how many downloads hit YouTube at once, and space out strategy retries,
+# so bursts of requests look less like a bot
+MAX_CONCURRENT_DOWNLOADS = 4
+_DOWNLOAD_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS)
+STRATEGY_RETRY_JITTER = (0.2, 1.0)  # seconds
+MIN_FREE_DISK_BYTES = 200 * 1024 * 1024
+
+# get_video_info results per video ID, least recently used first:
+# video_id -> (monotonic timestamp, info)
+_INFO_CACHE = collections.OrderedDict()
+_INFO_CACHE_LOCK = threading.Lock()
+_INFO_TTL = 21600  # 6 hours
+# Video IDs come from callers, so the in-memory caches are bounded LRUs
+INFO_CACHE_MAX_ENTRIES = 1024
+# Concurrent misses for the same video ID fetch only once; a fixed set of locks
+# striped by ID keeps this bounded however many IDs are seen
+_INFO_FETCH_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+# Videos that are rate limited or failed for a reason retrying won't fix,
+# least recently used first: video_id -> (monotonic expiry, error message)
+_NEG_CACHE = collections.OrderedDict()
+# Rate limits are remembered for an hour and videos that can't work for anyone for a day
+NEG_TTL_RATE_LIMITED = 3600
+NEG_TTL_UNAVAILABLE = 86400
+_RATE_LIMIT_MARKERS = ('http error 429', 'too many requests')
+_PERMANENT_ERROR_MARKERS = (
+    'video unavailable', 'private video', 'sign in to confirm your age',
+    'has been removed', 'not available in your country', 'members-only'
+)
+
+
+def _lru_put(cache, key, value):
+    """Insert into one of the bounded LRU caches, evicting the oldest entries (hold _INFO_CACHE_LOCK)"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > INFO_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+
+
+def _cached_info(video_id):
+    """Return the fresh in-memory info for video_id, or None (expired entries are dropped)"""
+    with _INFO_CACHE_LOCK:
+        cached = _INFO_CACHE.get(video_id)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= _INFO_TTL:
+            del _INFO_CACHE[video_id]
+            return None
+        _INFO_CACHE.move_to_end(video_id)
+        return cached[1]
+
+
+def _negative_ttl(message):
+    """How long to remember a failure message, or None if a retry may well succeed"""
+    message = message.lower()
+    if any(marker in message for marker in _RATE_LIMIT_MARKERS):
+        return NEG_TTL_RATE_LIMITED
+    if any(marker in message for marker in _PERMANENT_ERROR_MARKERS):
+        return NEG_TTL_UNAVAILABLE
+    return None
+
+
+def _remember_failure(video_id, message):
+    """Cache a rate-limit or unavailable failure for video_id; returns True if it was cached"""
+    ttl = _negative_ttl(message)
+    if ttl is None:
+        return False
+    with _INFO_CACHE_LOCK:
+        _lru_put(_NEG_CACHE, video_id, (time.monotonic() + ttl, message))
+    return True
+
+
+def _cached_failure(video_id):
+    """Return the cached failure message for video_id, or None if there isn't a fresh one"""
+    with _INFO_CACHE_LOCK:
+        negative = _NEG_CACHE.get(video_id)
+        if negative is None:
+            return None
+        if time.monotonic() >= negative[0]:
+            del _NEG_CACHE[video_id]
+            return None
+        _NEG_CACHE.move_to_end(video_id)
+        return negative[1]
+
+
+# Video metadata also persists in SQLite so it survives restarts and is shared between workers
+INFO_DB_PATH = os.path.join(tempfile.gettempdir(), 'yt_meta.sqlite3')
+_INFO_DB_TTL = 86400  # 24 hours
+
+
+def _info_db():
+    """Open the metadata database, creating the table on first use"""
+    conn = sqlite3.connect(INFO_DB_PATH, timeout=5)
+    conn.execute('CREATE TABLE IF NOT EXISTS video_info '
+                 '(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, info TEXT NOT NULL)')
+    return conn
+
+
+def _load_persisted_info(video_id):
+    """Return the persisted info dict for a video ID, or None if missing or expired"""
+    try:
+        with closing(_info_db()) as conn:
+            row = conn.execute('SELECT expires_at, info FROM video_info WHERE key = ?',
+                               (f"info:{video_id}",)).fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Video info cache read failed: {e}")
+        return None
+    if row is None or row[0] < time.time():
+        return None
+    return json.loads(row[1])
+
+
+def _persist_info(video_id, info):
+    """Store an info dict for a video ID for _INFO_DB_TTL seconds"""
+    try:
+        with closing(_info_db()) as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO video_info (key, expires_at, info) VALUES (?, ?, ?)',
+                         (f"info:{video_id}", time.time() + _INFO_DB_TTL, json.dumps(info)))
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Video info cache write failed: {e}")
+
+
+def _remember_info(video_id, info):
+    """Store an info dict in both the in-memory and the persisted metadata cache"""
+    _persist_info(video_id, info)
+    with _INFO_CACHE_LOCK:
+        _lru_put(_INFO_CACHE, video_id, (time.monotonic(), info))
+
+
+# Downloaded audio is kept per video ID so repeat requests skip the network entirely.
+# Files are named <video id>.<duration>.<ext> so a restore can enforce max_duration on its own.
+AUDIO_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'yt_audio_cache')
+_AUDIO_CACHE_TTL = 3 * 86400  # 3 days
+AUDIO_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def _audio_cache_dir():
+    """
+    Create AUDIO_CACHE_DIR readable only by this user and return it
+    
+    Returns None (cache disabled) when the directory can't be created or was
+    created by someone else, so another account can't plant files in it.
+    """
+    try:
+        os.makedirs(AUDIO_CACHE_DIR, mode=0o700, exist_ok=True)
+        dir_stat = os.lstat(AUDIO_CACHE_DIR)
+    except OSError as e:
+        logger.warning(f"⚠️ Audio cache unavailable: {e}")
+        return None
+    
+    if (not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid()
+            or dir_stat.st_mode & 0o077):
+        logger.warning(f"⚠️ Audio cache disabled: {AUDIO_CACHE_DIR} is not a private directory owned by this user")
+        return None
+    return AUDIO_CACHE_DIR
+
+
+def _link_or_copy(source, destination):
+    """Hardlink source to destination, copying when they're on different filesystems"""
+    try:
+        os.link(source, destination)
+    except FileExistsError:
+        os.remove(destination)
+        _link_or_copy(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _cached_audio(video_id):
+    """
+    Look up video_id in the audio cache, dropping the entry if it has expired
+    
+    Returns:
+        tuple: (cached file path, duration in seconds), or (None, None) on a miss
+    """
+    cache_dir = _audio_cache_dir()
+    if cache_dir is None:
+        return None, None
+    
+    prefix = video_id + '.'
+    try:
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith(prefix):
+                    continue
+                duration, _, extension = entry.name[len(prefix):].partition('.')
+                if not duration.isdigit() or extension not in _DOWNLOAD_EXTENSION_RANK:
+                    continue
+                
+                file_stat = entry.stat(follow_symlinks=False)
+                if file_stat.st_size == 0 or time.time() - file_stat.st_mtime > _AUDIO_CACHE_TTL:
+                    os.remove(entry.path)
+                    continue
+                return entry.path, int(duration)
+    except OSError as e:
+        logger.warning(f"⚠️ Audio cache lookup failed: {e}")
+    return None, None
+
+
+def _restore_cached_audio(cached_file, output_path):
+    """
+    Place a cached download next to output_path (as base.<ext>)
+    
+    Returns:
+        str: Path of the restored file, or None if it couldn't be restored
+    """
+    try:
+        extension = os.path.splitext(cached_file)[1]
+        restored_file = _output_base(output_path) + extension
+        _link_or_copy(cached_file, restored_file)
+        return restored_file
+    except OSError as e:
+        logger.warning(f"⚠️ Audio cache restore failed: {e}")
+        return None
+
+
+def _prune_audio_cache(cache_dir):
+    """Remove expired entries, then the oldest ones until the cache fits AUDIO_CACHE_MAX_BYTES"""
+    now = time.time()
+    entries = []
+    with os.scandir(cache_dir) as scan:
+        for entry in scan:
+            file_stat = entry.stat(follow_symlinks=False)
+            if now - file_stat.st_mtime > _AUDIO_CACHE_TTL:
+                os.remove(entry.path)
+            else:
+                entries.append((file_stat.st_mtime, file_stat.st_size, entry.path))
+    
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= AUDIO_CACHE_MAX_BYTES:
+            break
+        os.remove(path)
+        total_bytes -= size
+
+
+def _cache_downloaded_audio(video_id, output_path, duration):
+    """Keep the file just downloaded for output_path in the audio cache"""
+    downloaded_file = YouTubeDownloader.find_downloaded_file(_output_base(output_path))
+    cache_dir = _audio_cache_dir()
+    if downloaded_file is None or cache_dir is None:
+        return
+    
+    try:
+        extension = os.path.splitext(downloaded_file)[1]
+        _link_or_copy(downloaded_file, os.path.join(cache_dir, f"{video_id}.{int(duration)}{extension}"))
+        _prune_audio_cache(cache_dir)
+    except OSError as e:
+        logger.warning(f"⚠️ Audio cache write failed: {e}")
+
 
 class YouTubeDownloader:
     
     @staticmethod
     def is_valid_youtube_url(url):
         """Validate if the URL is a valid YouTube URL"""
-        youtube_patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)',
-            r'youtube\.com\/.*[?&]v=',
-        ]
-        
-        for pattern in youtube_patterns:
-            if re.search(pattern, url):
-                return True
-        return False
+        return bool(_YT_URL_RE.search(url))
     
     @staticmethod
     def extract_video_id(url):
-        """Extract video ID from YouTube URL"""
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&\n?#]+)',
-            r'youtube\.com\/embed\/([^&\n?#]+)',
-            r'youtube\.com\/v\/([^&\n?#]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        """Extract video ID from YouTube URL (None unless it is a well-formed 11-character ID)"""
+        # Fast path for the common youtube.com/watch?v= and youtu.be/ forms
+        parsed = urlparse(url)
+        hostname = parsed.hostname or ''
+        video_id = None
+        if hostname.endswith('youtube.com') and parsed.path == '/watch':
+            video_ids = parse_qs(parsed.query).get('v')
+            if video_ids:
+                video_id = video_ids[0]
+        elif hostname == 'youtu.be':
+            video_id = parsed.path.lstrip('/').split('/', 1)[0] or None
+        
+        # Fall back to the regex for embed/v URLs and anything unusual
+        if video_id is None:
+            match = _YT_ID_RE.search(url)
+            video_id = match.group(1) if match else None
+        
+        # IDs key the audio cache file names, so reject anything that isn't a plain ID
+        if video_id is None or not _VIDEO_ID_RE.fullmatch(video_id):
+            return None
+        return video_id
     
     @staticmethod
     def get_video_info_pytubefix(url):
@@ -52,9 +632,10 @@ class YouTubeDownloader:
         if not PYTUBEFIX_AVAILABLE:
             return None, "PytubeFixed not available"
         
+        pytubefix = _pytubefix()
         try:
-            print("🔄 Trying pytubefix info extraction")
-            yt = PytubeFixYouTube(url, use_oauth=False, allow_oauth_cache=False)
+            logger.debug("🔄 Trying pytubefix info extraction")
+            yt = pytubefix.YouTube(url, use_oauth=False, allow_oauth_cache=False)
             
             # Get basic info
             info = {
@@ -64,12 +645,12 @@ class YouTubeDownloader:
                 'uploader': yt.author or 'Unknown'
             }
             
-            print("✅ PytubeFixed info extraction succeeded")
+            logger.info("✅ PytubeFixed info extraction succeeded")
             return info, None
             
-        except VideoUnavailable as e:
+        except pytubefix.VideoUnavailable as e:
             return None, f"Video unavailable: {str(e)}"
-        except PytubeFixError as e:
+        except pytubefix.PytubeFixError as e:
             return None, f"PytubeFixed error: {str(e)}"
         except Exception as e:
             return None, f"PytubeFixed unexpected error: {str(e)}"
@@ -80,9 +661,24 @@ class YouTubeDownloader:
         if not PYTUBEFIX_AVAILABLE:
             return False, "PytubeFixed not available"
         
+        pytubefix = _pytubefix()
         try:
-            print("🔄 Trying pytubefix audio download")
-            yt = PytubeFixYouTube(url, use_oauth=False, allow_oauth_cache=False)
+            logger.debug("🔄 Trying pytubefix audio download")
+            yt = pytubefix.YouTube(url, use_oauth=False, allow_oauth_cache=False)
+            
+            # Security: Check duration limits
+            if yt.length and yt.length > max_duration:
+                return False, f"Video too long ({yt.length}s). Maximum allowed: {max_duration}s"
+            
+            # Keep the metadata pytubefix fetched so download_audio can cache the file with its duration
+            video_id = YouTubeDownloader.extract_video_id(url)
+            if video_id and yt.length:
+                _remember_info(video_id, {
+                    'title': yt.title,
+                    'duration': yt.length,
+                    'video_id': video_id,
+                    'uploader': yt.author
+                })
             
             # Get the best audio stream
             audio_stream = yt.streams.filter(only_audio=True, file_extension='mp4').first()
@@ -94,7 +690,7 @@ class YouTubeDownloader:
                 return False, "No audio streams available"
             
             # Download to the specified path
-            base_path = output_path.replace('.wav', '')
+            base_path = _output_base(output_path)
             output_file = f"{base_path}.m4a"
             
             # Download the file
@@ -102,21 +698,51 @@ class YouTubeDownloader:
                                 filename=os.path.basename(output_file))
             
             if os.path.exists(output_file):
-                print("✅ PytubeFixed audio download succeeded")
+                logger.info("✅ PytubeFixed audio download succeeded")
                 return True, f"PytubeFixed download successful: {output_file}"
             else:
                 return False, "PytubeFixed download completed but file not found"
                 
-        except VideoUnavailable as e:
+        except pytubefix.VideoUnavailable as e:
             return False, f"Video unavailable: {str(e)}"
-        except PytubeFixError as e:
+        except pytubefix.PytubeFixError as e:
             return False, f"PytubeFixed download error: {str(e)}"
         except Exception as e:
             return False, f"PytubeFixed unexpected error: {str(e)}"
 
     @staticmethod
     def get_video_info_cli(url):
-        """Get video info using yt-dlp command line - sometimes more reliable"""
+        """
+        Get video info with yt-dlp's default (CLI-style) settings - sometimes more reliable
+        
+        Runs in-process to avoid starting a new interpreter per call; set YTDL_USE_CLI=1
+        to spawn the yt-dlp executable instead when debugging.
+        """
+        if YTDL_USE_CLI:
+            return YouTubeDownloader._get_video_info_subprocess(url)
+        
+        try:
+            ydl_opts = {
+                'quiet': True,
+                'no_warnings': True,
+                'http_headers': _CLI_HTTP_HEADERS['info']
+            }
+            with _yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+            
+            return {
+                'title': info.get('title'),
+                'duration': int(info.get('duration') or 0),
+                'video_id': info.get('id'),
+                'uploader': info.get('uploader')
+            }, None
+            
+        except Exception as e:
+            return None, f"CLI method error: {str(e)}"
+    
+    @staticmethod
+    def _get_video_info_subprocess(url):
+        """Get video info by running the yt-dlp executable"""
         try:
             cmd = [
                 'yt-dlp',
@@ -130,7 +756,7 @@ class YouTubeDownloader:
                 url
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+            result = _run_cli(cmd, timeout=15)
             
             if result.returncode == 0 and result.stdout:
                 parts = result.stdout.strip().split('|')
@@ -149,146 +775,77 @@ class YouTubeDownloader:
 
     @staticmethod
     def get_video_info(url):
-        """Get video information without downloading"""
-        # Try multiple strategies for getting video info - Production-optimized Aug 2025
-        strategies = [
-            {
-                'name': 'server_android_vr',
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['android_vr'],
-                        'player_skip': ['webpage', 'configs'],
-                    }
-                },
-                'http_headers': {
-                    'User-Agent': 'com.google.android.apps.youtube.vr.oculus/1.56.21 (Linux; U; Android 12; eureka-user Build/SQ3A.220605.009.A1)',
-                    'Accept': '*/*',
-                    'X-Forwarded-For': '8.8.8.8',  # Google DNS to appear less server-like
-                    'Accept-Language': 'en-US,en;q=0.9'
-                }
-            },
-            {
-                'name': 'mweb_tier_2',
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['mweb'],
-                        'player_skip': ['webpage', 'configs'],
-                    }
-                },
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Linux; Android 13; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Mobile Safari/537.36',
-                    'Accept': '*/*',
-                    'Accept-Encoding': 'gzip, deflate',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Cache-Control': 'no-cache',
-                    'Pragma': 'no-cache',
-                    'Sec-Fetch-Dest': 'empty',
-                    'Sec-Fetch-Mode': 'cors',
-                    'Sec-Fetch-Site': 'same-origin'
-                }
-            },
-            {
-                'name': 'ios_creator',
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['ios_creator'],
-                        'player_skip': ['webpage'],
-                    }
-                },
-                'http_headers': {
-                    'User-Agent': 'com.google.ios.ytcreator/1.19.8.15622 (iPhone15,2; U; CPU iOS 16_6 like Mac OS X)',
-                    'Accept': '*/*',
-                    'Accept-Language': 'en-US,en;q=0.9'
-                }
-            },
-            {
-                'name': 'android_vr',
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['android_vr'],
-                        'player_skip': ['webpage'],
-                    }
-                },
-                'http_headers': {
-                    'User-Agent': 'com.google.android.apps.youtube.vr.oculus/1.56.21 (Linux; U; Android 12; eureka-user Build/SQ3A.220605.009.A1)',
-                    'Accept': '*/*'
-                }
-            },
-            {
-                'name': 'ios_music',
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['ios_music'],
-                        'player_skip': ['webpage'],
-                    }
-                },
-                'http_headers': {
-                    'User-Agent': 'com.google.ios.youtubemusic/6.42.52 (iPhone14,3; U; CPU iOS 15_6 like Mac OS X)',
-                    'Accept': '*/*'
-                }
-            },
-            {
-                'name': 'tv_embedded_fallback',
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['tv_embedded'],
-                        'player_skip': ['webpage', 'configs'],
-                        'include_incomplete_formats': False
-                    }
-                },
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (ChromiumStylePlatform) Cobalt/40.13031-qa (unlike Gecko) v8/8.5.210.20 gles Starboard/15',
-                    'Accept': '*/*'
-                }
-            }
-        ]
+        """Get video information without downloading, cached per video ID for _INFO_TTL"""
+        video_id = YouTubeDownloader.extract_video_id(url)
+        if not video_id:
+            return YouTubeDownloader._get_video_info_uncached(url)
         
-        # Try pytubefix first (primary method for 2025)
-        if PYTUBEFIX_AVAILABLE:
-            pytubefix_info, pytubefix_error = YouTubeDownloader.get_video_info_pytubefix(url)
-            if pytubefix_info:
-                info = pytubefix_info
-            else:
-                print(f"❌ PytubeFixed failed: {pytubefix_error}")
+        fetch_lock = _INFO_FETCH_LOCKS[hash(video_id) % len(_INFO_FETCH_LOCKS)]
         
-        # If pytubefix failed, try yt-dlp strategies
-        if 'info' not in locals():
-            last_error = None
-            for strategy in strategies:
+        with fetch_lock:
+            cached = _cached_info(video_id)
+            if cached:
+                return dict(cached), None
+            
+            failure = _cached_failure(video_id)
+            if failure:
+                return None, failure
+            
+            info = _load_persisted_info(video_id)
+            if info:
+                error = None
+            else:
                 try:
-                    print(f"🔄 Trying yt-dlp strategy: {strategy['name']}")
-                    ydl_opts = {
-                        'quiet': True,
-                        'no_warnings': True,
-                        'extractor_args': strategy['extractor_args'],
-                        'http_headers': strategy['http_headers'],
-                        'socket_timeout': 10,
-                        'retries': 0,  # No retries per strategy to fail fast
-                        'fragment_retries': 0,
-                        'skip_unavailable_fragments': True,
-                        'geo_bypass': True,
-                        'no_check_certificate': True
-                    }
-                    
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(url, download=False)
-                        print(f"✅ yt-dlp strategy {strategy['name']} succeeded")
-                        break  # Success, exit loop
-                        
+                    info, error = YouTubeDownloader._get_video_info_uncached(url)
                 except Exception as e:
-                    print(f"❌ yt-dlp strategy {strategy['name']} failed: {str(e)[:100]}")
-                    last_error = e
-                    if strategy == strategies[-1]:  # Last strategy failed, try CLI fallback
-                        print("🔄 All yt-dlp strategies failed, trying CLI fallback")
-                        cli_info, cli_error = YouTubeDownloader.get_video_info_cli(url)
-                        if cli_info:
-                            info = cli_info
-                            print("✅ CLI fallback succeeded")
-                            break
-                        else:
-                            print(f"❌ CLI fallback failed: {cli_error}")
-                            raise last_error  # Re-raise the last error
-                    continue
+                    # Remember rate limits and videos that can't work for anyone (private,
+                    # removed, ...), so repeated requests don't run every strategy again
+                    # and deepen a ban; other errors propagate
+                    if not _remember_failure(video_id, str(e)):
+                        raise
+                    return None, str(e)
+                if info:
+                    _persist_info(video_id, info)
+                elif error:
+                    _remember_failure(video_id, error)
+            
+            if info:
+                with _INFO_CACHE_LOCK:
+                    _lru_put(_INFO_CACHE, video_id, (time.monotonic(), dict(info)))
+            return info, error
+    
+    @staticmethod
+    def get_duration_cached(video_id):
+        """Return a video's duration from the metadata caches only, or None if it isn't cached"""
+        cached = _cached_info(video_id)
+        if cached:
+            return cached.get('duration')
+        info = _load_persisted_info(video_id)
+        return info.get('duration') if info else None
+    
+    @staticmethod
+    def _get_video_info_uncached(url, time_budget=STRATEGY_TIME_BUDGET):
+        """Get video information without downloading, trying strategies for at most time_budget seconds"""
+        deadline = time.monotonic() + time_budget
+        # pytubefix (primary method for 2025) races the yt-dlp strategies
+        strategies = (_PYTUBEFIX_STRATEGY,) + _INFO_STRATEGIES if PYTUBEFIX_AVAILABLE else _INFO_STRATEGIES
+        _, info, last_error = YouTubeDownloader._race_strategies(
+            _prioritize_strategies(strategies),
+            lambda strategy: _extract_info_with_strategy(url, strategy),
+            INFO_STRATEGY_RACE_WIDTH,
+            deadline=deadline)
+        
+        if info is None:  # Every strategy failed, try CLI fallback
+            if time.monotonic() >= deadline:
+                raise last_error or TimeoutError("Strategy time budget exhausted")
+            logger.debug("🔄 All strategies failed, trying CLI fallback")
+            cli_info, cli_error = YouTubeDownloader.get_video_info_cli(url)
+            if cli_info:
+                info = cli_info
+                logger.info("✅ CLI fallback succeeded")
+            else:
+                logger.warning(f"❌ CLI fallback failed: {cli_error}")
+                raise last_error  # Re-raise the last error
         
         try:
             duration = info.get('duration', 0)
@@ -297,22 +854,125 @@ class YouTubeDownloader:
             return {
                 'title': title,
                 'duration': duration,
-                'video_id': info.get('id'),
+                'video_id': info.get('id') or info.get('video_id'),
                 'uploader': info.get('uploader', 'Unknown')
             }, None
                 
         except Exception as e:
             return None, f"Error getting video info: {str(e)}"
     
+    @staticmethod
+    def _race_strategies(strategies, attempt, width, fatal=(), deadline=None):
+        """
+        Run attempt(strategy) for `width` strategies at a time; the first success wins
+        
+        A failed strategy is replaced by the next one in order, so the slowest case is
+        bounded by a couple of timeouts instead of one per strategy.
+        
+        Args:
+            strategies (list): Strategy dicts, in the order to try them
+            attempt (callable): Takes a strategy and returns a result, raising on failure
+            width (int): Number of strategies in flight at once
+            fatal (tuple): Exception types that end the race and are re-raised
+            deadline (float): time.monotonic() value after which no new strategy starts and
+                the race gives up
+            
+        Returns:
+            tuple: (winning strategy or None, its result or None, last exception or None)
+        """
+        remaining = iter(strategies)
+        running = {}
+        last_error = None
+        
+        def launch_next():
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            strategy = next(remaining, None)
+            if strategy is not None:
+                logger.debug(f"🔄 Trying strategy: {strategy['name']}")
+                running[_STRATEGY_POOL.submit(attempt, strategy)] = strategy
+        
+        for _ in range(width):
+            launch_next()
+        
+        try:
+            while running:
+                timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.warning("⏱️ Strategy time budget exhausted")
+                    return None, None, last_error or TimeoutError("Strategy time budget exhausted")
+                for future in done:
+                    strategy = running.pop(future)
+                    try:
+                        result = future.result()
+                    except fatal:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"❌ Strategy {strategy['name']} failed: {str(e)[:100]}")
+                        _record_strategy(strategy, False, e)
+                        last_error = e
+                        launch_next()
+                        continue
+                    
+                    logger.info(f"✅ Strategy {strategy['name']} succeeded")
+                    _record_strategy(strategy, True)
+                    return strategy, result, None
+        finally:
+            for loser in running:
+                loser.cancel()  # Only stops strategies that haven't started yet
+        
+        return None, None, last_error
+    
     @staticmethod
     def download_audio_cli(url, output_path, max_duration=600):
-        """Download audio using yt-dlp CLI - sometimes more reliable than Python API"""
+        """
+        Download audio with yt-dlp's default (CLI-style) settings - sometimes more reliable
+        
+        Runs in-process to avoid starting a new interpreter per call; set YTDL_USE_CLI=1
+        to spawn the yt-dlp executable instead when debugging.
+        """
+        if YTDL_USE_CLI:
+            return YouTubeDownloader._download_audio_subprocess(url, output_path, max_duration)
+        
+        try:
+            ydl_opts = {
+                'format': 'bestaudio[ext=m4a]/bestaudio/best',
+                'outtmpl': _output_base(output_path) + '.%(ext)s',
+                'noplaylist': True,
+                'quiet': True,
+                'no_warnings': True,
+                'http_headers': _CLI_HTTP_HEADERS['download'],
+                'socket_timeout': 15,
+                'retries': 0,
+                'fragment_retries': 0,
+                'match_filter': _yt_dlp().utils.match_filter_func(f'duration <=? {max_duration}'),
+                'break_on_reject': True
+            }
+            downloaded = {}
+            ydl_opts['progress_hooks'] = [_finished_file_hook(downloaded)]
+            with _yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
+            requested = info.get('requested_downloads') or [{}]
+            downloaded_file = requested[0].get('filepath') or downloaded.get('path')
+            
+            if downloaded_file and os.path.exists(downloaded_file):
+                return True, f"CLI download successful: {downloaded_file}"
+            
+            return False, "CLI download completed but file not found"
+            
+        except Exception as e:
+            return False, f"CLI download failed: {str(e)}"
+    
+    @staticmethod
+    def _download_audio_subprocess(url, output_path, max_duration):
+        """Download audio by running the yt-dlp executable"""
         try:
             # Use yt-dlp command line with aggressive bot bypass
             cmd = [
                 'yt-dlp',
                 '--format', 'bestaudio[ext=m4a]/bestaudio/best',
-                '--output', output_path.replace('.wav', '.%(ext)s'),
+                '--output', _output_base(output_path) + '.%(ext)s',
                 '--no-playlist',
                 '--quiet',
                 '--no-warnings',
@@ -323,25 +983,24 @@ class YouTubeDownloader:
                 '--socket-timeout', '15',
                 '--retries', '0',
                 '--fragment-retries', '0',
+                '--match-filter', f'duration <=? {max_duration}',
+                '--break-on-reject',
+                # Have yt-dlp report the final file path instead of guessing extensions
+                '--print', 'after_move:filepath',
                 url
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            result = _run_cli(cmd, timeout=60)
             
             if result.returncode == 0:
                 # Check if file was created
-                base_path = output_path.replace('.wav', '')
-                possible_files = [
-                    f"{base_path}.m4a", 
-                    f"{base_path}.webm",
-                    f"{base_path}.mp4",
-                    f"{base_path}.opus",
-                    output_path
-                ]
+                printed = result.stdout.strip().splitlines()
+                downloaded_file = printed[-1] if printed else None
+                if not downloaded_file:
+                    downloaded_file = YouTubeDownloader.find_downloaded_file(_output_base(output_path))
                 
-                for possible_file in possible_files:
-                    if os.path.exists(possible_file):
-                        return True, f"CLI download successful: {possible_file}"
+                if downloaded_file and os.path.exists(downloaded_file):
+                    return True, f"CLI download successful: {downloaded_file}"
                 
                 return False, "CLI download completed but file not found"
             else:
@@ -351,132 +1010,172 @@ class YouTubeDownloader:
             return False, f"CLI download error: {str(e)}"
 
     @staticmethod
-    def download_audio(url, output_path, max_duration=600):  # 10 minutes max
-        """Download audio from YouTube video with security checks"""
+    def download_audio(url, output_path, max_duration=600, time_budget=STRATEGY_TIME_BUDGET):  # 10 minutes max
+        """
+        Download audio from YouTube video with security checks
+        
+        Strategies are tried for at most time_budget seconds before giving up.
+        """
+        # All local checks run before waiting for a download slot or touching the network
+        passed, error = YouTubeDownloader._precheck(url, output_path)
+        if not passed:
+            return False, error
+        
+        # Reject known-long videos straight from the metadata cache, without a network call
+        # (a cached download carries its own duration, which outlives the metadata caches)
+        video_id = YouTubeDownloader.extract_video_id(url)
+        cached_file, cached_duration = _cached_audio(video_id) if video_id else (None, None)
+        if cached_duration is None and video_id:
+            cached_duration = YouTubeDownloader.get_duration_cached(video_id)
+        if cached_duration and cached_duration > max_duration:
+            return False, f"Video too long ({cached_duration}s). Maximum allowed: {max_duration}s"
+        
+        failure = _cached_failure(video_id) if video_id else None
+        if failure:
+            return False, failure
+        
+        output_path = os.path.abspath(output_path)
+        if cached_file:
+            restored_file = _restore_cached_audio(cached_file, output_path)
+            if restored_file:
+                logger.info(f"✅ Reused cached audio for {video_id}")
+                return True, f"Download successful (cached): {restored_file}"
+        
+        with _DOWNLOAD_SLOTS:
+            success, message = YouTubeDownloader._download_audio(url, output_path, max_duration, time_budget)
+        
+        if success and video_id:
+            # Only downloads with a known duration are cached, so a restore can always check it
+            duration = YouTubeDownloader.get_duration_cached(video_id)
+            if duration:
+                _cache_downloaded_audio(video_id, output_path, duration)
+        elif video_id:
+            _remember_failure(video_id, message)
+        return success, message
+    
+    @staticmethod
+    def _precheck(url, output_path):
+        """
+        Cheap local validation for download_audio: URL format, output path and free disk space
+        
+        Returns:
+            tuple: (passed: bool, error message or None)
+        """
+        # Validate URL format first
+        if not YouTubeDownloader.is_valid_youtube_url(url):
+            return False, "Invalid YouTube URL format"
+        
+        # Security: Validate output path to prevent directory traversal
+        # (realpath resolves '..' and symlinks; the prefixes end in a separator so only
+        # whole path components match)
+        real_output_path = os.path.realpath(output_path)
+        if not real_output_path.startswith(_ALLOWED_PREFIXES):
+            logger.warning(f"❌ Path validation failed: {os.path.abspath(output_path)} "
+                           f"(allowed paths: {list(_ALLOWED_ROOTS)})")
+            return False, "Invalid output path"
+        
         try:
-            # Validate URL format first
-            if not YouTubeDownloader.is_valid_youtube_url(url):
-                return False, "Invalid YouTube URL format"
+            free_bytes = shutil.disk_usage(os.path.dirname(real_output_path)).free
+        except OSError:
+            free_bytes = None  # Directory doesn't exist yet; the downloader creates it
+        if free_bytes is not None and free_bytes < MIN_FREE_DISK_BYTES:
+            return False, "Not enough free disk space for download"
+        
+        return True, None
+    
+    @staticmethod
+    def download_audio_batch(items, max_workers=MAX_CONCURRENT_DOWNLOADS, max_duration=600):
+        """
+        Download several videos' audio concurrently
+        
+        Each download still takes one of the shared download slots, so a batch
+        never pushes more than MAX_CONCURRENT_DOWNLOADS requests at YouTube.
+        
+        Args:
+            items (list): (url, output_path) pairs
+            max_workers (int): Number of download threads
+            max_duration (int): Maximum video length in seconds
             
-            # Get video info first to check duration
-            info, error = YouTubeDownloader.get_video_info(url)
-            if error:
-                return False, error
+        Returns:
+            list: (url, success: bool, message: str) per item, in order
+        """
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='yt-download') as pool:
+            results = pool.map(lambda item: YouTubeDownloader.download_audio(item[0], item[1], max_duration), items)
+            return [(url, success, message) for (url, _), (success, message) in zip(items, results)]
+    
+    @staticmethod
+    def iter_download_audio(items, prefetch=2, max_duration=600):
+        """
+        Download videos' audio in order, fetching the next ones in the background
+        
+        Lets a caller process file N (e.g. transcribe it) while files N+1..N+prefetch
+        are still downloading.
+        
+        Args:
+            items (iterable): (url, output_path) pairs
+            prefetch (int): Number of downloads to keep running ahead of the caller
+            max_duration (int): Maximum video length in seconds
             
-            # Security: Check duration limits
-            if info['duration'] > max_duration:
-                return False, f"Video too long ({info['duration']}s). Maximum allowed: {max_duration}s"
-            
-            # Security: Validate output path to prevent directory traversal
-            import os
-            output_path = os.path.abspath(output_path)
-            # Allow uploads directory and /tmp directory
-            allowed_paths = ['/tmp/', os.getcwd(), os.path.abspath('../uploads'), os.path.abspath('./uploads')]
-            path_allowed = any(output_path.startswith(allowed_path) for allowed_path in allowed_paths)
-            
-            if not path_allowed:
-                print(f"❌ Path validation failed: {output_path}")
-                print(f"   Allowed paths: {allowed_paths}")
-                return False, "Invalid output path"
-            
-            # Try multiple download strategies to avoid bot detection - Production-optimized Aug 2025
-            strategies = [
-                {
-                    'name': 'server_android_vr',
-                    'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[filesize<100M]',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android_vr'],
-                            'player_skip': ['webpage', 'configs'],
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'com.google.android.apps.youtube.vr.oculus/1.56.21 (Linux; U; Android 12; eureka-user Build/SQ3A.220605.009.A1)',
-                        'Accept': '*/*',
-                        'X-Forwarded-For': '8.8.8.8',  # Google DNS to appear less server-like
-                        'Accept-Language': 'en-US,en;q=0.9'
-                    }
-                },
-                {
-                    'name': 'mweb_tier_2',
-                    'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[filesize<100M]',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['mweb'],
-                            'player_skip': ['webpage', 'configs'],
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Linux; Android 13; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Mobile Safari/537.36',
-                        'Accept': '*/*',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Cache-Control': 'no-cache',
-                        'Pragma': 'no-cache',
-                        'Sec-Fetch-Dest': 'empty',
-                        'Sec-Fetch-Mode': 'cors',
-                        'Sec-Fetch-Site': 'same-origin'
-                    }
-                },
-                {
-                    'name': 'ios_creator',
-                    'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[filesize<100M]',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['ios_creator'],
-                            'player_skip': ['webpage'],
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'com.google.ios.ytcreator/1.19.8.15622 (iPhone15,2; U; CPU iOS 16_6 like Mac OS X)',
-                        'Accept': '*/*',
-                        'Accept-Language': 'en-US,en;q=0.9'
-                    }
-                },
-                {
-                    'name': 'android_vr',
-                    'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[filesize<100M]',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android_vr'],
-                            'player_skip': ['webpage'],
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'com.google.android.apps.youtube.vr.oculus/1.56.21 (Linux; U; Android 12; eureka-user Build/SQ3A.220605.009.A1)',
-                        'Accept': '*/*'
-                    }
-                },
-                {
-                    'name': 'ios_music',
-                    'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[filesize<100M]',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['ios_music'],
-                            'player_skip': ['webpage'],
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'com.google.ios.youtubemusic/6.42.52 (iPhone14,3; U; CPU iOS 15_6 like Mac OS X)',
-                        'Accept': '*/*'
-                    }
-                },
-                {
-                    'name': 'tv_embedded_final',
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best[filesize<100M]',
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['tv_embedded'],
-                            'player_skip': ['webpage', 'configs'],
-                            'include_incomplete_formats': False
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (ChromiumStylePlatform) Cobalt/40.13031-qa (unlike Gecko) v8/8.5.210.20 gles Starboard/15',
-                        'Accept': '*/*'
-                    }
-                }
-            ]
+        Yields:
+            tuple: (url, success: bool, message: str) per item, in order
+        """
+        items = iter(items)
+        pending = []
+        with ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix='yt-prefetch') as pool:
+            def submit_next():
+                item = next(items, None)
+                if item is not None:
+                    url, output_path = item
+                    pending.append((url, pool.submit(YouTubeDownloader.download_audio, url, output_path, max_duration)))
+            
+            for _ in range(max(1, prefetch)):
+                submit_next()
+            while pending:
+                url, future = pending.pop(0)
+                submit_next()
+                success, message = future.result()
+                yield url, success, message
+    
+    @staticmethod
+    async def download_audio_async(url, output_path, max_duration=600):
+        """
+        Async wrapper around download_audio for asyncio callers
+        
+        The download runs on a worker thread so the event loop stays free; it still
+        takes one of the shared download slots, so asyncio.gather over many URLs
+        never pushes more than MAX_CONCURRENT_DOWNLOADS requests at YouTube.
+        
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        return await asyncio.to_thread(YouTubeDownloader.download_audio, url, output_path, max_duration)
+    
+    @staticmethod
+    async def get_video_info_async(url):
+        """
+        Async wrapper around get_video_info for asyncio callers
+        
+        The lookup (including any yt-dlp CLI fallback) runs on a worker thread, so
+        the event loop isn't blocked while it waits on the network.
+        
+        Returns:
+            tuple: (info dict or None, error message or None)
+        """
+        return await asyncio.to_thread(YouTubeDownloader.get_video_info, url)
+    
+    @staticmethod
+    def _download_audio(url, output_path, max_duration, time_budget=STRATEGY_TIME_BUDGET):
+        """
+        download_audio body, run after _precheck while holding one of the download slots
+        
+        No new strategy (or the CLI fallback) starts once time_budget seconds have passed;
+        a download already under way is allowed to finish.
+        """
+        deadline = time.monotonic() + time_budget
+        try:
+            video_id = YouTubeDownloader.extract_video_id(url)
+            strategies = _DOWNLOAD_STRATEGIES
             
             # Try pytubefix first (primary method for 2025)
             download_success = False
@@ -486,100 +1185,137 @@ class YouTubeDownloader:
                 if pytubefix_success:
                     download_success = True
                     success_message = pytubefix_message
-                    print("✅ PytubeFixed download completed, skipping yt-dlp strategies")
+                    logger.info("✅ PytubeFixed download completed, skipping yt-dlp strategies")
                 else:
-                    print(f"❌ PytubeFixed download failed: {pytubefix_message}")
+                    logger.warning(f"❌ PytubeFixed download failed: {pytubefix_message}")
             
-            # If pytubefix failed, try yt-dlp strategies
+            # If pytubefix failed, race metadata probes to find a strategy that works right
+            # now, then download once with it, reusing the info the probe already extracted
             if not download_success:
-                for strategy in strategies:
+                strategies = _prioritize_strategies(strategies)
+                winner, probed_info, probe_error = YouTubeDownloader._race_strategies(
+                    strategies,
+                    lambda strategy: _probe_download_strategy(url, strategy, max_duration),
+                    DOWNLOAD_PROBE_RACE_WIDTH,
+                    fatal=(_yt_dlp().utils.RejectedVideoReached,),
+                    deadline=deadline)
+                
+                # If the winner's download fails, fall back to the other strategies in order
+                strategies = [winner] + [strategy for strategy in strategies if strategy is not winner] if winner else []
+                last_error = probe_error
+                for attempt, strategy in enumerate(strategies):
+                    if attempt:
+                        time.sleep(random.uniform(*STRATEGY_RETRY_JITTER))
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
                     try:
-                        print(f"🔄 Trying yt-dlp strategy: {strategy['name']}")
-                        
-                        ydl_opts = {
-                            'format': strategy['format'],
-                            'outtmpl': output_path.replace('.wav', '.%(ext)s'),
-                            'noplaylist': True,
-                            'quiet': True,  # Reduce noise for multiple attempts
-                            'no_warnings': True,
-                            'extract_flat': False,
-                            'socket_timeout': 15,
-                            'retries': 0,  # No retries per strategy to fail fast
-                            'fragment_retries': 0,
-                            'skip_unavailable_fragments': True,
-                            'geo_bypass': True,
-                            'no_check_certificate': True,
-                            'extractor_args': strategy['extractor_args'],
-                            'http_headers': strategy['http_headers']
-                        }
+                        logger.debug(f"🔄 Downloading with yt-dlp strategy: {strategy['name']}")
                         
-                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                            ydl.download([url])
+                        ydl_opts = _download_options(strategy, output_path, max_duration)
+                        # Later strategies get shorter socket timeouts as the budget runs out
+                        ydl_opts['socket_timeout'] = min(ydl_opts['socket_timeout'], max(2, int(remaining / 2)))
+                        downloaded = {}
+                        ydl_opts['progress_hooks'] = [_finished_file_hook(downloaded)]
+                        with _yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                            if strategy is winner:
+                                info = ydl.process_ie_result(probed_info, download=True)
+                            else:
+                                info = ydl.extract_info(url, download=True)
+                        # yt-dlp knows where it wrote the file: prefer the final path recorded
+                        # after postprocessing, then the one the progress hook saw finish
+                        requested = info.get('requested_downloads') or [{}]
+                        downloaded_file = requested[0].get('filepath') or downloaded.get('path')
                         
                         # If we get here, download was successful
-                        print(f"✅ yt-dlp download successful with strategy: {strategy['name']}")
+                        logger.info(f"✅ yt-dlp download successful with strategy: {strategy['name']} "
+                              f"({info.get('title', 'Unknown')}, {info.get('duration', 0)}s)")
+                        
+                        # The download already extracted the metadata; keep it for get_video_info
+                        if video_id:
+                            info_summary = {
+                                'title': info.get('title', 'Unknown'),
+                                'duration': info.get('duration', 0),
+                                'video_id': info.get('id'),
+                                'uploader': info.get('uploader', 'Unknown')
+                            }
+                            _remember_info(video_id, info_summary)
+                        if strategy is not winner:  # The winner's success was counted by the probe race
+                            _record_strategy(strategy, True)
                         download_success = True
                         break
                         
+                    except _yt_dlp().utils.RejectedVideoReached:
+                        return False, f"Video too long. Maximum allowed: {max_duration}s"
                     except Exception as e:
-                        print(f"❌ yt-dlp strategy {strategy['name']} failed: {str(e)}")
-                        if strategy == strategies[-1]:  # Last strategy failed, try CLI fallback
-                            print("🔄 All yt-dlp strategies failed, trying CLI fallback")
-                            cli_success, cli_message = YouTubeDownloader.download_audio_cli(url, output_path, max_duration)
-                            if cli_success:
-                                print("✅ CLI fallback download succeeded")
-                                return cli_success, cli_message
-                            else:
-                                print(f"❌ CLI fallback failed: {cli_message}")
-                                raise e  # Re-raise the last error
-                        continue
+                        logger.warning(f"❌ yt-dlp strategy {strategy['name']} failed: {str(e)}")
+                        _record_strategy(strategy, False, e)
+                        last_error = e
+                
+                if not download_success:  # Every strategy failed, try CLI fallback
+                    if time.monotonic() >= deadline:
+                        raise last_error or TimeoutError("Strategy time budget exhausted")
+                    logger.debug("🔄 All yt-dlp strategies failed, trying CLI fallback")
+                    cli_success, cli_message = YouTubeDownloader.download_audio_cli(url, output_path, max_duration)
+                    if cli_success:
+                        logger.info("✅ CLI fallback download succeeded")
+                        return cli_success, cli_message
+                    else:
+                        logger.warning(f"❌ CLI fallback failed: {cli_message}")
+                        raise last_error  # Re-raise the last error
             
             # If pytubefix succeeded, return its result
             if download_success and success_message:
                 return True, success_message
             
-            # Otherwise check if yt-dlp file was actually downloaded
-            base_path = output_path.replace('.wav', '')
-            possible_files = [
-                f"{base_path}.webm",
-                f"{base_path}.m4a", 
-                f"{base_path}.mp4",
-                f"{base_path}.opus",
-                output_path
-            ]
-            
-            downloaded_file = None
-            for possible_file in possible_files:
-                if os.path.exists(possible_file):
-                    downloaded_file = possible_file
-                    break
-            
-            if downloaded_file:
+            # Otherwise report the file yt-dlp says it downloaded
+            if download_success and downloaded_file and os.path.exists(downloaded_file):
                 return True, f"Download successful: {downloaded_file}"
             else:
                 return False, "Download completed but file not found"
             
-        except yt_dlp.DownloadError as e:
-            # Check if download actually succeeded despite the error
-            base_path = output_path.replace('.wav', '')
-            possible_files = [f"{base_path}.webm", f"{base_path}.m4a", f"{base_path}.mp4", f"{base_path}.opus", output_path]
-            
-            for possible_file in possible_files:
-                if os.path.exists(possible_file):
-                    return True, f"Download successful despite error: {possible_file}"
-            
+        except _yt_dlp().utils.RejectedVideoReached:
+            return False, f"Video too long. Maximum allowed: {max_duration}s"
+        except _yt_dlp().DownloadError as e:
+            # The audio may have landed before a later step failed
+            downloaded_file = YouTubeDownloader.find_downloaded_file(_output_base(output_path))
+            if downloaded_file:
+                return True, f"Download successful: {downloaded_file}"
             return False, f"Download failed: {str(e)}"
         except Exception as e:
             return False, f"Unexpected error: {str(e)}"
     
+    @staticmethod
+    def find_downloaded_file(base_path):
+        """
+        Find the audio file saved as base_path.<ext> with a single directory scan
+        
+        Args:
+            base_path (str): Output path without extension
+            
+        Returns:
+            str: Path of the downloaded file, or None if there isn't one
+        """
+        directory, base_name = os.path.split(base_path)
+        prefix = base_name + '.'
+        matches = {}
+        try:
+            with os.scandir(directory or '.') as entries:
+                for entry in entries:
+                    if entry.name.startswith(prefix):
+                        extension = entry.name[len(prefix):]
+                        if extension in _DOWNLOAD_EXTENSION_RANK:
+                            matches[extension] = entry.path
+        except OSError:
+            return None
+        
+        if not matches:
+            return None
+        return matches[min(matches, key=_DOWNLOAD_EXTENSION_RANK.get)]
+    
     @staticmethod
     def sanitize_filename(filename):
         """Sanitize filename for safe storage"""
-        # Remove invalid characters
-        filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-        # Replace spaces with underscores
-        filename = filename.replace(' ', '_')
-        # Limit length
-        if len(filename) > 100:
-            filename = filename[:100]
-        return filename
\ No newline at end of file
+        # Remove invalid characters and replace spaces with underscores in one pass
+        # (and limit length)
+        return filename.translate(_FILENAME_TRANSLATION)[:100]
\ No newline at end of file
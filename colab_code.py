@@ -21,19 +21,24 @@ print(f"MIDI file exists: {os.path.exists(original_midi_path)}")
 # Check actual drive structure
 base_path = "/content/drive/MyDrive"
 print(f"\nContents of {base_path}:")
-for item in os.listdir(base_path):
-    if os.path.isdir(os.path.join(base_path, item)):
-        print(f"📁 {item}")
+# One scandir listing serves both loops; entry types come from the listing
+# itself, so nothing is stat'ed over the Drive mount
+with os.scandir(base_path) as it:
+    drive_entries = list(it)
+for entry in drive_entries:
+    if entry.is_dir():
+        print(f"📁 {entry.name}")
     else:
-        print(f"📄 {item}")
+        print(f"📄 {entry.name}")
 
 # Look for APS360 or maestro folders
 print(f"\nLooking for APS360/maestro folders:")
-for item in os.listdir(base_path):
+for entry in drive_entries:
+    item = entry.name
     if "APS360" in item or "maestro" in item.lower():
-        full_path = os.path.join(base_path, item)
+        full_path = entry.path
         print(f"Found: {full_path}")
-        if os.path.isdir(full_path):
+        if entry.is_dir():
             try:
                 subcontents = os.listdir(full_path)[:10]  # First 10 items
                 print(f"  Contains: {subcontents}")
@@ -50,20 +55,29 @@ for item in os.listdir(base_path):
 import shutil
 from google.colab import files
 
+def _stat(path):
+    """os.stat, or None if the file is missing (one Drive round-trip per file)"""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
 # UPDATE THESE PATHS based on what you found in BLOCK 1
 # Replace with actual paths found in your drive
 actual_audio_path = original_audio_path  # Update this
 actual_midi_path = original_midi_path    # Update this
 
 # Check files exist
-if os.path.exists(actual_audio_path) and os.path.exists(actual_midi_path):
+audio_stat = _stat(actual_audio_path)
+midi_stat = _stat(actual_midi_path)
+if audio_stat and midi_stat:
     print(f"✅ Files found!")
-    print(f"Audio: {actual_audio_path}")
-    print(f"MIDI: {actual_midi_path}")
+    print(f"Audio: {actual_audio_path} ({audio_stat.st_size:,} bytes)")
+    print(f"MIDI: {actual_midi_path} ({midi_stat.st_size:,} bytes)")
     
-    # Copy files for download
-    shutil.copy(actual_audio_path, 'maestro_sample_0_original.wav')
-    shutil.copy(actual_midi_path, 'maestro_sample_0_original.mid')
+    # Copy files for download (copyfile: kernel sendfile, no permission copying)
+    shutil.copyfile(actual_audio_path, 'maestro_sample_0_original.wav')
+    shutil.copyfile(actual_midi_path, 'maestro_sample_0_original.mid')
     
     # Download files
     files.download('maestro_sample_0_original.wav')
@@ -73,8 +87,8 @@ if os.path.exists(actual_audio_path) and os.path.exists(actual_midi_path):
     
 else:
     print("❌ Files not found. Update the paths in this block.")
-    print(f"Audio exists: {os.path.exists(actual_audio_path)}")
-    print(f"MIDI exists: {os.path.exists(actual_midi_path)}")
+    print(f"Audio exists: {audio_stat is not None}")
+    print(f"MIDI exists: {midi_stat is not None}")
 
 # =============================================================================
 
@@ -82,20 +96,45 @@ else:
 # ==========================================================
 # If paths are too complex, just find any MAESTRO file
 
-def find_maestro_files():
-    """Find any MAESTRO files in the drive"""
+# Folders between the drive root and the dataset (APS360_*/data/raw/maestro-v3.0.0);
+# pass as parent_dirs to search only that layout instead of the whole tree
+MAESTRO_PARENT_DIRS = {'data', 'raw'}
+
+def find_maestro_files(parent_dirs=None):
+    """Find any MAESTRO files in the drive
+    
+    parent_dirs: folder names that may lead to a maestro folder; outside a
+    maestro folder only these (and APS360 folders) are descended into.
+    None searches every folder.
+    """
     maestro_files = []
     base_path = "/content/drive/MyDrive"
     
-    for root, dirs, files in os.walk(base_path):
-        for file in files:
-            if file.endswith('.wav') and 'maestro' in root.lower():
-                full_path = os.path.join(root, file)
-                maestro_files.append(full_path)
-                if len(maestro_files) >= 5:  # Find first 5
-                    break
-        if len(maestro_files) >= 5:
-            break
+    # scandir reuses each entry's d_type, so there is no extra stat per file
+    # (os.walk's cost on Drive mounts); the stack holds (dir, under_maestro)
+    stack = [(base_path, 'maestro' in base_path.lower())]
+    while stack and len(maestro_files) < 5:  # Find first 5
+        root, in_maestro = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.name.endswith('.wav'):
+                        if in_maestro and entry.is_file():
+                            maestro_files.append(entry.path)
+                            if len(maestro_files) >= 5:
+                                break
+                    elif entry.is_dir(follow_symlinks=False):
+                        dir_name = entry.name.lower()
+                        # With parent_dirs, outside a maestro folder only descend along the path that can lead to one
+                        if in_maestro or 'maestro' in dir_name:
+                            subdirs.append((entry.path, True))
+                        elif parent_dirs is None or 'aps360' in dir_name or dir_name in parent_dirs:
+                            subdirs.append((entry.path, False))
+        except OSError:
+            continue
+        # Reversed so directories are visited in listing order, like os.walk
+        stack.extend(reversed(subdirs))
     
     return maestro_files
 
@@ -111,7 +150,7 @@ if maestro_files:
     filename = os.path.basename(first_file)
     
     print(f"Downloading: {filename}")
-    shutil.copy(first_file, f'maestro_sample_{filename}')
+    shutil.copyfile(first_file, f'maestro_sample_{filename}')
     files.download(f'maestro_sample_{filename}')
     print("✅ Downloaded!")
 else:
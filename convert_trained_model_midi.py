@@ -3,89 +3,169 @@
 Convert the trained model MIDI to WAV and compare with random weights version
 """
 
-import pretty_midi
+import symusic
 import numpy as np
 import soundfile as sf
+import functools
+import importlib.util
 import os
 
+# Native FluidSynth rendering is used when pyfluidsynth and a General MIDI SoundFont are installed
+FLUIDSYNTH_AVAILABLE = importlib.util.find_spec('fluidsynth') is not None
+SOUNDFONT_PATH = os.environ.get('SOUNDFONT_PATH', '/usr/share/sounds/sf2/FluidR3_GM.sf2')
+
+# Upper bound on (notes x samples) elements synthesized at once
+_MAX_BATCH_ELEMENTS = 4_000_000
+
+# One row per note; start/end are sample indices into the output buffer
+NOTE_DTYPE = np.dtype([('pitch', np.uint8), ('velocity', np.uint8), ('start', np.int64), ('end', np.int64)])
+
+# Equal-tempered frequency (Hz) of every MIDI pitch, A4 (69) = 440 Hz
+MIDI_FREQ = 440.0 * 2.0 ** ((np.arange(128) - 69) / 12.0)
+
+@functools.lru_cache(maxsize=8)
+def _load_score(midi_path, mtime):
+    """Parse a MIDI file once per modification time"""
+    return symusic.Score(midi_path)
+
+def load_score(midi_path):
+    """Load a MIDI file, reusing the parse if the file hasn't changed"""
+    return _load_score(midi_path, os.path.getmtime(midi_path))
+
+def ticks_to_seconds(ticks, score):
+    """Convert MIDI ticks to seconds (float64) through the score's tempo map"""
+    tempos = score.tempos.numpy()
+    change_ticks = tempos['time'].astype(np.int64)
+    seconds_per_tick = tempos['mspq'].astype(np.float64) / 1e6 / score.ticks_per_quarter
+    if len(change_ticks) == 0 or change_ticks[0] > 0:
+        # MIDI's default tempo (120 BPM) applies until the first tempo event
+        change_ticks = np.concatenate([[0], change_ticks])
+        seconds_per_tick = np.concatenate([[0.5 / score.ticks_per_quarter], seconds_per_tick])
+    change_seconds = np.concatenate([[0.0], np.cumsum(np.diff(change_ticks) * seconds_per_tick[:-1])])
+    
+    segment = np.searchsorted(change_ticks, ticks, side='right') - 1
+    return change_seconds[segment] + (ticks - change_ticks[segment]) * seconds_per_tick[segment]
+
+def midi_to_wav_fluidsynth(midi_path, wav_path, sample_rate=44100):
+    """
+    Render MIDI to WAV with FluidSynth and the General MIDI SoundFont
+    """
+    import pretty_midi
+    
+    audio = pretty_midi.PrettyMIDI(midi_path).fluidsynth(fs=sample_rate, sf2_path=SOUNDFONT_PATH)
+    if len(audio) == 0:
+        print("❌ No audio generated")
+        return False
+    
+    # Normalize in place from a single peak measurement
+    peak = max(audio.max(), -audio.min())
+    if peak > 0:
+        audio *= 0.8 / peak
+    
+    sf.write(wav_path, audio, sample_rate, subtype='PCM_16')
+    print(f"✅ Saved (FluidSynth): {wav_path}")
+    return True
+
 def midi_to_wav_advanced(midi_path, wav_path, sample_rate=44100):
     """
     Convert MIDI to WAV with better synthesis
     """
     try:
         print(f"🎼 Processing: {os.path.basename(midi_path)}")
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
         
-        duration = midi_data.get_end_time()
+        # Prefer the native synthesizer; the NumPy synth below is the fallback
+        if FLUIDSYNTH_AVAILABLE and os.path.exists(SOUNDFONT_PATH):
+            return midi_to_wav_fluidsynth(midi_path, wav_path, sample_rate)
+        # symusic parses in C++ and hands back note columns as NumPy arrays (times in ticks)
+        score = load_score(midi_path)
+        
+        duration = float(ticks_to_seconds(np.int64(score.end()), score))
         print(f"📊 Duration: {duration:.2f} seconds")
         
-        if not midi_data.instruments:
+        if not score.tracks:
             print("❌ No instruments found")
             return False
             
-        total_notes = sum(len(inst.notes) for inst in midi_data.instruments)
+        total_notes = score.note_num()
         print(f"📊 Total notes: {total_notes}")
         
-        # Create audio buffer
+        # Create audio buffer (float32 end to end; the WAV is written as 16-bit PCM)
         audio_length = int(duration * sample_rate)
-        audio = np.zeros(audio_length)
+        audio = np.zeros(audio_length, dtype=np.float32)
         
         print("🔊 Synthesizing audio...")
         
-        # Process each instrument
-        for inst_idx, instrument in enumerate(midi_data.instruments):
-            print(f"   Processing {len(instrument.notes)} notes...")
+        # Gather every note into one structured table, sorted by onset so each batch
+        # adds into the buffer front to back
+        columns = [track.notes.numpy() for track in score.tracks]
+        start_ticks = np.concatenate([c['time'] for c in columns]).astype(np.int64)
+        end_ticks = start_ticks + np.concatenate([c['duration'] for c in columns])
+        notes = np.empty(len(start_ticks), dtype=NOTE_DTYPE)
+        notes['pitch'] = np.concatenate([c['pitch'] for c in columns])
+        notes['velocity'] = np.concatenate([c['velocity'] for c in columns])
+        notes['start'] = (ticks_to_seconds(start_ticks, score) * sample_rate).astype(np.int64)
+        notes['end'] = (ticks_to_seconds(end_ticks, score) * sample_rate).astype(np.int64)
+        notes.sort(order='start')
+        
+        # Clip to the buffer and drop notes that don't sound inside it
+        notes['end'] = np.minimum(notes['end'], audio_length)
+        note_lengths = notes['end'] - notes['start']
+        keep = (notes['start'] < audio_length) & (note_lengths > 0)
+        notes = notes[keep]
+        note_lengths = note_lengths[keep]
+        
+        # Convert MIDI notes to frequencies
+        freqs = MIDI_FREQ[notes['pitch']]
+        velocity_scales = notes['velocity'] / 127.0
+        start_samples = notes['start']
+        
+        # Notes of the same length share their time axis and envelope, so synthesize
+        # each length class as one 2D batch
+        for note_length in np.unique(note_lengths):
+            note_length = int(note_length)
+            batch = np.flatnonzero(note_lengths == note_length)
             
-            for note in instrument.notes:
-                # Convert MIDI note to frequency
-                freq = 440 * (2 ** ((note.pitch - 69) / 12))
-                
-                # Calculate sample indices
-                start_sample = int(note.start * sample_rate)
-                end_sample = int(note.end * sample_rate)
-                
-                if end_sample > len(audio):
-                    end_sample = len(audio)
-                if start_sample >= len(audio):
-                    continue
-                
-                # Generate note
-                note_length = end_sample - start_sample
-                if note_length <= 0:
-                    continue
-                    
-                t = np.linspace(0, note_length / sample_rate, note_length)
-                
-                # Better envelope (ADSR-like)
-                envelope = np.ones(note_length)
-                attack_samples = min(int(0.02 * sample_rate), note_length // 3)
-                release_samples = min(int(0.1 * sample_rate), note_length // 3)
-                
-                # Attack
-                if attack_samples > 0:
-                    envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-                
-                # Release
-                if release_samples > 0:
-                    envelope[-release_samples:] = np.linspace(1, 0, release_samples)
+            # float32 is plenty for 16-bit output and doubles np.sin throughput
+            t = np.linspace(0, note_length / sample_rate, note_length, dtype=np.float32)
+            
+            # Better envelope (ADSR-like): attack ramp, sustain and release ramp fused
+            # into one clipped expression
+            attack_samples = min(int(0.02 * sample_rate), note_length // 3)
+            release_samples = min(int(0.1 * sample_rate), note_length // 3)
+            ramp = np.arange(note_length, dtype=np.float32)
+            attack = ramp / max(attack_samples - 1, 1) if attack_samples > 0 else 1
+            release = (note_length - 1 - ramp) / (release_samples - 1) if release_samples > 1 else 1
+            envelope = np.clip(np.minimum(attack, release), 0, 1, dtype=np.float32)
+            
+            # Bound each batch's (notes x samples) arrays to a few million elements
+            rows_per_chunk = max(1, _MAX_BATCH_ELEMENTS // note_length)
+            for chunk_start in range(0, len(batch), rows_per_chunk):
+                rows = batch[chunk_start:chunk_start + rows_per_chunk]
+                phase = (2 * np.pi * freqs[rows, None]).astype(np.float32) * t
                 
-                # Generate richer sound (fundamental + harmonics)
-                velocity_scale = note.velocity / 127.0
-                fundamental = 0.6 * np.sin(2 * np.pi * freq * t)
-                harmonic2 = 0.3 * np.sin(2 * np.pi * freq * 2 * t)  # Octave
-                harmonic3 = 0.1 * np.sin(2 * np.pi * freq * 3 * t)  # Fifth
+                # Generate richer sound (fundamental + harmonics); the harmonics come from
+                # sin(2x) = 2 sin x cos x and sin(3x) = sin x (3 - 4 sin^2 x), so each
+                # note costs one sin and one cos instead of three sins
+                sin1 = np.sin(phase)
+                cos1 = np.cos(phase, out=phase)
+                fundamental = 0.6 * sin1
+                harmonic2 = 0.3 * (2 * sin1 * cos1)  # Octave
+                harmonic3 = 0.1 * (sin1 * (3 - 4 * sin1 * sin1))  # Fifth
                 
-                note_wave = velocity_scale * 0.15 * envelope * (fundamental + harmonic2 + harmonic3)
+                gains = (velocity_scales[rows, None] * 0.15).astype(np.float32)
+                note_waves = gains * envelope * (fundamental + harmonic2 + harmonic3)
                 
                 # Add to audio buffer
-                audio[start_sample:end_sample] += note_wave
+                for start_sample, note_wave in zip(start_samples[rows].tolist(), note_waves):
+                    audio[start_sample:start_sample + note_length] += note_wave
         
-        # Normalize
-        if np.max(np.abs(audio)) > 0:
-            audio = audio / np.max(np.abs(audio)) * 0.8
+        # Normalize in place from a single peak measurement
+        peak = max(audio.max(), -audio.min())
+        if peak > 0:
+            audio *= 0.8 / peak
         
         # Save
-        sf.write(wav_path, audio, sample_rate)
+        sf.write(wav_path, audio, sample_rate, subtype='PCM_16')
         print(f"✅ Saved: {wav_path}")
         return True
         
@@ -124,11 +204,8 @@ def compare_models():
         
         # Analyze MIDIs
         try:
-            trained_data = pretty_midi.PrettyMIDI(trained_midi)
-            random_data = pretty_midi.PrettyMIDI(random_midi)
-            
-            trained_notes = sum(len(inst.notes) for inst in trained_data.instruments)
-            random_notes = sum(len(inst.notes) for inst in random_data.instruments)
+            trained_notes = load_score(trained_midi).note_num()
+            random_notes = load_score(random_midi).note_num()
             
             print(f"\n🎼 Note Analysis:")
             print(f"   Trained Model: {trained_notes:,} notes")
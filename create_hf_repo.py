@@ -50,8 +50,12 @@ def create_manual_upload_instructions():
         shutil.rmtree(temp_dir)
     os.makedirs(temp_dir)
     
-    # Copy model file
-    shutil.copy2(model_path, os.path.join(temp_dir, "pytorch_model.bin"))
+    # Hardlink the model file (no bytes copied); copy if temp dir is on another filesystem
+    staged_model = os.path.join(temp_dir, "pytorch_model.bin")
+    try:
+        os.link(model_path, staged_model)
+    except OSError:
+        shutil.copyfile(model_path, staged_model)
     
     # Create README
     readme_content = """---
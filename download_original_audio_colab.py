@@ -63,8 +63,8 @@ if os.path.exists(correct_audio_path) and os.path.exists(correct_midi_path):
     filename_part = "MIDI-Unprocessed_18_R1_2009_01-03_ORIG_MID--AUDIO_18_R1_2009_18_R1_2009_02_WAV"
     
     # Copy files for download
-    shutil.copy(correct_audio_path, f'original_maestro_audio_{filename_part}.wav')
-    shutil.copy(correct_midi_path, f'original_maestro_midi_{filename_part}.mid')
+    shutil.copyfile(correct_audio_path, f'original_maestro_audio_{filename_part}.wav')
+    shutil.copyfile(correct_midi_path, f'original_maestro_midi_{filename_part}.mid')
     
     # Download files
     files.download(f'original_maestro_audio_{filename_part}.wav')
@@ -6,12 +6,25 @@
 
 # STEP 1: Find the actual MAESTRO files in your drive
 # ==================================================
+import json
 import os
 import shutil
 from google.colab import files
 
-def find_maestro_files_in_drive():
-    """Search for MAESTRO files in all APS360 folders"""
+# Folders between the drive root and the dataset (APS360_*/data/raw/maestro-v3.0.0);
+# pass as parent_dirs to search only that layout instead of the whole tree
+MAESTRO_PARENT_DIRS = {'data', 'raw'}
+
+# Search results from earlier runs, keyed by the APS360 folders' mtimes
+MAESTRO_INDEX_PATH = "/content/drive/MyDrive/.maestro_index.json"
+
+def find_maestro_files_in_drive(parent_dirs=None):
+    """Search for MAESTRO files in all APS360 folders
+    
+    parent_dirs: folder names that may lead to a maestro folder; outside a
+    maestro folder only these (and APS360 folders) are descended into.
+    None searches every folder.
+    """
     base_path = "/content/drive/MyDrive"
     maestro_files = {'audio': [], 'midi': []}
     
@@ -21,26 +34,68 @@ def find_maestro_files_in_drive():
         "APS360_Team_2_Project (1)"
     ]
     
+    # Reuse the last search if the folders are unchanged and its first files still exist
+    folder_mtimes = {}
+    for folder in aps360_folders:
+        try:
+            folder_mtimes[folder] = os.stat(os.path.join(base_path, folder)).st_mtime
+        except OSError:
+            pass
+    try:
+        with open(MAESTRO_INDEX_PATH) as f:
+            index = json.load(f)
+        if index['mtimes'] == folder_mtimes and all(
+                os.path.exists(path) for path in index['files']['audio'][:1] + index['files']['midi'][:1]):
+            print(f"Using cached search results from {MAESTRO_INDEX_PATH}")
+            return index['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    
     for folder in aps360_folders:
         folder_path = os.path.join(base_path, folder)
-        if os.path.exists(folder_path):
+        if folder in folder_mtimes:
             print(f"Checking {folder}...")
             
-            # Walk through the directory tree
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if 'maestro' in root.lower():
-                        full_path = os.path.join(root, file)
-                        if file.endswith('.wav'):
-                            maestro_files['audio'].append(full_path)
-                        elif file.endswith('.mid') or file.endswith('.midi'):
-                            maestro_files['midi'].append(full_path)
-                        
-                        # Stop after finding a few files
-                        if len(maestro_files['audio']) >= 3:
-                            break
-                if len(maestro_files['audio']) >= 3:
-                    break
+            # Walk the tree with scandir: entry types come from the directory
+            # listing, so files are never stat'ed (os.walk's cost on Drive mounts)
+            stack = [(folder_path, 'maestro' in folder_path.lower())]
+            while stack and len(maestro_files['audio']) < 3:
+                root, in_maestro = stack.pop()
+                subdirs = []
+                try:
+                    with os.scandir(root) as it:
+                        for entry in it:
+                            name = entry.name
+                            if name.endswith(('.wav', '.mid', '.midi')):
+                                if not in_maestro or not entry.is_file():
+                                    continue
+                                if name.endswith('.wav'):
+                                    maestro_files['audio'].append(entry.path)
+                                else:
+                                    maestro_files['midi'].append(entry.path)
+                                
+                                # Stop after finding a few files
+                                if len(maestro_files['audio']) >= 3:
+                                    break
+                            elif entry.is_dir(follow_symlinks=False):
+                                dir_name = name.lower()
+                                # With parent_dirs, outside a maestro folder only descend along the path that can lead to one
+                                if in_maestro or 'maestro' in dir_name:
+                                    subdirs.append((entry.path, True))
+                                elif parent_dirs is None or 'aps360' in dir_name or dir_name in parent_dirs:
+                                    subdirs.append((entry.path, False))
+                except OSError:
+                    continue
+                # Reversed so directories are visited in listing order, like os.walk
+                stack.extend(reversed(subdirs))
+    
+    # Only successful searches are saved so a later dataset download is picked up
+    if maestro_files['audio']:
+        try:
+            with open(MAESTRO_INDEX_PATH, 'w') as f:
+                json.dump({'mtimes': folder_mtimes, 'files': maestro_files}, f)
+        except OSError as e:
+            print(f"Could not save search results: {e}")
     
     return maestro_files
 
@@ -77,8 +132,8 @@ if maestro_files['audio'] and maestro_files['midi']:
     
     try:
         # Copy files for download
-        shutil.copy(first_audio, 'maestro_original_audio.wav')
-        shutil.copy(first_midi, 'maestro_original_midi.mid')
+        shutil.copyfile(first_audio, 'maestro_original_audio.wav')
+        shutil.copyfile(first_midi, 'maestro_original_midi.mid')
         
         # Download files
         files.download('maestro_original_audio.wav')
@@ -130,8 +185,8 @@ for path in known_paths:
                         midi_path = os.path.join(year_path, midi_files[0])
                         
                         print(f"📥 Downloading: {audio_files[0]}")
-                        shutil.copy(audio_path, 'maestro_sample_original.wav')
-                        shutil.copy(midi_path, 'maestro_sample_original.mid')
+                        shutil.copyfile(audio_path, 'maestro_sample_original.wav')
+                        shutil.copyfile(midi_path, 'maestro_sample_original.mid')
                         
                         files.download('maestro_sample_original.wav')
                         files.download('maestro_sample_original.mid')
@@ -4,6 +4,9 @@ Simplified MAESTRO analysis - process AI prediction only
 """
 import numpy as np
 import torch
+import collections
+import importlib.util
+import math
 import os
 import sys
 
@@ -13,6 +16,87 @@ sys.path.append('/Users/kev/360_website/backend')
 from models.piano_transcription import load_model
 from services.midi_generator import predictions_to_midi
 
+# Native FluidSynth rendering is used when pyfluidsynth and a General MIDI SoundFont are installed
+FLUIDSYNTH_AVAILABLE = importlib.util.find_spec('fluidsynth') is not None
+SOUNDFONT_PATH = os.environ.get('SOUNDFONT_PATH', '/usr/share/sounds/sf2/FluidR3_GM.sf2')
+
+WEIGHTS_PATH = '/Users/kev/360_website/backend/weights/piano_transcription_weights.pth'
+OUTPUT_DIR = "/Users/kev/360_website/maestro_analysis"
+
+# Upper bound on (notes x samples) elements synthesized at once (keeps temporaries in cache)
+_MAX_BATCH_ELEMENTS = 131_072
+
+# Equal-tempered frequency (Hz) of every MIDI pitch, A4 (69) = 440 Hz, as plain floats
+# for per-note lookups
+MIDI_FREQ = (440.0 * 2.0 ** ((np.arange(128) - 69) / 12.0)).tolist()
+
+def synthesize_notes(midi_data, duration, sample_rate=44100):
+    """Additive sine synthesis (ADSR envelope, 3 harmonics) of every note"""
+    # Create audio (float32 throughout; the WAV is written as 16-bit PCM)
+    audio_length = int(duration * sample_rate)
+    audio = np.zeros(audio_length, dtype=np.float32)
+    
+    # Shared sample clock, sliced per note length (no note outlasts the audio)
+    t_grid = np.arange(audio_length, dtype=np.float32) / np.float32(sample_rate)
+    
+    # Group notes by length: equal-length notes share their time axis and envelope,
+    # so each group is synthesized as one (notes x samples) block
+    buckets = collections.defaultdict(list)
+    for instrument in midi_data.instruments:
+        for note in instrument.notes:
+            freq = MIDI_FREQ[note.pitch]
+            start_sample = int(note.start * sample_rate)
+            end_sample = int(note.end * sample_rate)
+            
+            if end_sample > len(audio) or start_sample >= len(audio):
+                continue
+            
+            note_length = end_sample - start_sample
+            if note_length <= 0:
+                continue
+            
+            buckets[note_length].append((start_sample, freq, note.velocity / 127.0))
+    
+    for note_length, bucket in buckets.items():
+        t = t_grid[:note_length]
+        
+        # Simple envelope
+        envelope = np.ones(note_length, dtype=np.float32)
+        attack = min(int(0.02 * sample_rate), note_length // 3)
+        release = min(int(0.1 * sample_rate), note_length // 3)
+        
+        if attack > 0:
+            envelope[:attack] = np.linspace(0, 1, attack)
+        if release > 0:
+            envelope[-release:] = np.linspace(1, 0, release)
+        
+        starts, freqs, velocity_scales = (np.array(column) for column in zip(*bucket))
+        
+        # Notes of the same pitch and length share one enveloped waveform, so only
+        # the bucket's distinct pitches are synthesized; each note adds a scaled copy
+        unique_freqs, template_index = np.unique(freqs, return_inverse=True)
+        gains = (velocity_scales * 0.15).astype(np.float32)
+        
+        # Bound each block so its float32 temporaries stay cache-sized
+        rows_per_chunk = max(1, _MAX_BATCH_ELEMENTS // note_length)
+        for chunk_start in range(0, len(unique_freqs), rows_per_chunk):
+            chunk_freqs = unique_freqs[chunk_start:chunk_start + rows_per_chunk]
+            
+            # Generate sound
+            phase = (2 * np.pi * chunk_freqs[:, None]).astype(np.float32) * t
+            fundamental = 0.6 * np.sin(phase)
+            harmonic2 = 0.3 * np.sin(2 * phase)
+            harmonic3 = 0.1 * np.sin(3 * phase)
+            templates = envelope * (fundamental + harmonic2 + harmonic3)
+            
+            in_chunk = np.flatnonzero((template_index >= chunk_start) &
+                                      (template_index < chunk_start + len(chunk_freqs)))
+            for i in in_chunk.tolist():
+                start_sample = starts[i]
+                audio[start_sample:start_sample + note_length] += gains[i] * templates[template_index[i] - chunk_start]
+    
+    return audio
+
 def midi_to_wav_advanced(midi_path, wav_path, sample_rate=44100):
     """Convert MIDI to WAV with good synthesis"""
     try:
@@ -26,47 +110,16 @@ def midi_to_wav_advanced(midi_path, wav_path, sample_rate=44100):
         if total_notes == 0:
             return False
         
-        # Create audio
-        audio_length = int(duration * sample_rate)
-        audio = np.zeros(audio_length)
-        
-        for instrument in midi_data.instruments:
-            for note in instrument.notes:
-                freq = 440 * (2 ** ((note.pitch - 69) / 12))
-                start_sample = int(note.start * sample_rate)
-                end_sample = int(note.end * sample_rate)
-                
-                if end_sample > len(audio) or start_sample >= len(audio):
-                    continue
-                
-                note_length = end_sample - start_sample
-                if note_length <= 0:
-                    continue
-                
-                t = np.linspace(0, note_length / sample_rate, note_length)
-                
-                # Simple envelope
-                envelope = np.ones(note_length)
-                attack = min(int(0.02 * sample_rate), note_length // 3)
-                release = min(int(0.1 * sample_rate), note_length // 3)
-                
-                if attack > 0:
-                    envelope[:attack] = np.linspace(0, 1, attack)
-                if release > 0:
-                    envelope[-release:] = np.linspace(1, 0, release)
-                
-                # Generate sound
-                velocity_scale = note.velocity / 127.0
-                fundamental = 0.6 * np.sin(2 * np.pi * freq * t)
-                harmonic2 = 0.3 * np.sin(2 * np.pi * freq * 2 * t)
-                harmonic3 = 0.1 * np.sin(2 * np.pi * freq * 3 * t)
-                
-                note_wave = velocity_scale * 0.15 * envelope * (fundamental + harmonic2 + harmonic3)
-                audio[start_sample:end_sample] += note_wave
+        if FLUIDSYNTH_AVAILABLE and os.path.exists(SOUNDFONT_PATH):
+            # Native FluidSynth render; the NumPy synth is the fallback
+            audio = midi_data.fluidsynth(fs=sample_rate, sf2_path=SOUNDFONT_PATH)
+        else:
+            audio = synthesize_notes(midi_data, duration, sample_rate)
         
-        # Normalize
-        if np.max(np.abs(audio)) > 0:
-            audio = audio / np.max(np.abs(audio)) * 0.8
+        # Normalize in place from a single peak measurement
+        peak = max(audio.max(), -audio.min())
+        if peak > 0:
+            audio *= 0.8 / peak
         
         sf.write(wav_path, audio, sample_rate)
         return True
@@ -75,72 +128,107 @@ def midi_to_wav_advanced(midi_path, wav_path, sample_rate=44100):
         print(f"❌ Audio generation error: {e}")
         return False
 
-def analyze_maestro_prediction():
-    """Generate AI prediction and audio from MAESTRO sample"""
-    
-    print("🎼 MAESTRO Sample 0 - AI Prediction Analysis")
-    print("=" * 60)
-    
-    # Load sample features
-    sample_data = np.load('/Users/kev/360_website/maestro_sample_0_full.npz', allow_pickle=True)
-    features = sample_data['audio']  # Mel spectrogram features (312, 128)
-    
-    print(f"📊 Features shape: {features.shape} (time, mels)")
-    print(f"📊 Duration: ~{features.shape[0] * 512 / 16000:.1f} seconds")
+class MaestroAnalyzer:
+    """
+    Holds the trained transcription model so analyzing many samples pays the
+    weight-loading cost once
+    """
     
-    output_dir = "/Users/kev/360_website/maestro_analysis"
+    def __init__(self, model_path=WEIGHTS_PATH, device=None):
+        self.device = device or torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.model_path = model_path
+        self._model = None
     
-    # Load trained model
-    print(f"\n🤖 Loading trained model...")
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    model = load_model('/Users/kev/360_website/backend/weights/piano_transcription_weights.pth', device)
+    @property
+    def model(self):
+        """Trained model, loaded on first use"""
+        if self._model is None:
+            print(f"\n🤖 Loading trained model...")
+            self._model = load_model(self.model_path, self.device)
+            self._model.eval()
+        return self._model
     
-    # Run inference
-    print(f"🧠 Running model inference...")
-    model.eval()
-    with torch.no_grad():
-        features_tensor = torch.FloatTensor(features.T).unsqueeze(0).to(device)  # (1, 128, time)
-        predictions = model(features_tensor)
-        predictions = torch.sigmoid(predictions).cpu().numpy().squeeze()  # (88, time)
+    def predict(self, features):
+        """Note logits (88, time), on the model's device, for (time, mels) features"""
+        model = self.model
+        # fp16 autocast on CUDA; logits are cast back to fp32 for thresholding
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type, dtype=torch.float16,
+                                                    enabled=(self.device.type == 'cuda')):
+            features_tensor = torch.from_numpy(np.ascontiguousarray(features.T, dtype=np.float32)).unsqueeze(0)  # (1, 128, time)
+            if self.device.type == 'cuda':
+                features_tensor = features_tensor.pin_memory()
+            features_tensor = features_tensor.to(self.device, non_blocking=True)
+            return model(features_tensor).squeeze(0).float()  # (88, time)
     
-    # Analyze predictions at different thresholds
-    print(f"\n🎹 Note predictions at different thresholds:")
-    thresholds = [0.1, 0.3, 0.5, 0.7, 0.9]
-    for thresh in thresholds:
-        note_count = (predictions > thresh).sum()
-        print(f"   Threshold {thresh}: {note_count:,} activations")
-    
-    # Generate MIDI
-    print(f"\n🎵 Generating MIDI...")
-    midi_path = os.path.join(output_dir, "maestro_sample_0_ai_prediction.mid")
-    predictions_tensor = torch.FloatTensor(predictions)
-    
-    success = predictions_to_midi(predictions_tensor, midi_path, threshold=0.5)
-    
-    if success:
-        print(f"✅ MIDI saved: {midi_path}")
+    def analyze(self, sample_path, output_dir=OUTPUT_DIR):
+        """Generate AI prediction MIDI and audio for one MAESTRO sample"""
+        sample_name = os.path.splitext(os.path.basename(sample_path))[0].replace('_full', '')
         
-        # Convert to audio
-        print(f"🔊 Converting to audio...")
-        audio_path = os.path.join(output_dir, "maestro_sample_0_ai_prediction.wav")
+        print(f"🎼 {sample_name} - AI Prediction Analysis")
+        print("=" * 60)
         
-        if midi_to_wav_advanced(midi_path, audio_path):
-            print(f"🎧 Audio saved: {audio_path}")
-            
-            # Get file info
-            file_size = os.path.getsize(midi_path)
-            print(f"\n📊 Results:")
-            print(f"   🎼 MIDI file: {file_size:,} bytes")
-            print(f"   🎧 Audio file: maestro_sample_0_ai_prediction.wav")
-            print(f"   📁 Location: {output_dir}/")
+        # Load sample features (only the 'audio' member is decompressed; no pickled objects)
+        with np.load(sample_path) as sample_data:
+            features = sample_data['audio']  # Mel spectrogram features (312, 128)
+        
+        print(f"📊 Features shape: {features.shape} (time, mels)")
+        print(f"📊 Duration: ~{features.shape[0] * 512 / 16000:.1f} seconds")
+        
+        # Run inference
+        print(f"🧠 Running model inference...")
+        logits = self.predict(features)
+        
+        # Analyze predictions at different thresholds; sigmoid(x) > p exactly when
+        # x > log(p / (1 - p)), so the sweep runs on the logits without leaving the device.
+        # One sort answers every threshold with a binary search instead of a pass each
+        print(f"\n🎹 Note predictions at different thresholds:")
+        thresholds = [0.1, 0.3, 0.5, 0.7, 0.9]
+        sorted_logits = logits.flatten().sort().values
+        logit_thresholds = torch.tensor([math.log(t / (1 - t)) for t in thresholds],
+                                        dtype=sorted_logits.dtype, device=self.device)
+        counts = sorted_logits.numel() - torch.searchsorted(sorted_logits, logit_thresholds, right=True)
+        for thresh, note_count in zip(thresholds, counts.tolist()):
+            print(f"   Threshold {thresh}: {note_count:,} activations")
+        
+        # Only the 0.5-threshold piano roll (logit > 0) comes back to the CPU, as uint8
+        piano_roll = (logits > 0).to(torch.uint8).cpu()
+        
+        # Generate MIDI
+        print(f"\n🎵 Generating MIDI...")
+        midi_path = os.path.join(output_dir, f"{sample_name}_ai_prediction.mid")
+        
+        success = predictions_to_midi(piano_roll, midi_path, threshold=0.5, already_probs=True)
+        
+        if success:
+            print(f"✅ MIDI saved: {midi_path}")
             
-            print(f"\n💡 This transcription comes from the exact MAESTRO sample")
-            print(f"   that the model was trained on, so it should be very accurate!")
+            # Convert to audio
+            print(f"🔊 Converting to audio...")
+            audio_path = os.path.join(output_dir, f"{sample_name}_ai_prediction.wav")
             
+            if midi_to_wav_advanced(midi_path, audio_path):
+                print(f"🎧 Audio saved: {audio_path}")
+                
+                # Get file info
+                file_size = os.path.getsize(midi_path)
+                print(f"\n📊 Results:")
+                print(f"   🎼 MIDI file: {file_size:,} bytes")
+                print(f"   🎧 Audio file: {os.path.basename(audio_path)}")
+                print(f"   📁 Location: {output_dir}/")
+                
+                print(f"\n💡 This transcription comes from the exact MAESTRO sample")
+                print(f"   that the model was trained on, so it should be very accurate!")
+                
+            else:
+                print("❌ Audio conversion failed")
         else:
-            print("❌ Audio conversion failed")
-    else:
-        print("❌ MIDI generation failed")
+            print("❌ MIDI generation failed")
+        
+        return success
+
+def analyze_maestro_prediction():
+    """Generate AI prediction and audio from MAESTRO sample"""
+    MaestroAnalyzer().analyze('/Users/kev/360_website/maestro_sample_0_full.npz')
 
 if __name__ == "__main__":
     analyze_maestro_prediction()
\ No newline at end of file
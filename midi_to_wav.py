@@ -5,6 +5,7 @@ Convert MIDI file to WAV using pretty_midi
 
 import sys
 import pretty_midi
+import symusic
 import numpy as np
 import soundfile as sf
 
@@ -39,9 +40,10 @@ def midi_to_wav(midi_path, wav_path, sample_rate=44100):
             print("❌ No audio generated - MIDI might be empty or invalid")
             return False
             
-        # Normalize audio to prevent clipping
-        if np.max(np.abs(audio)) > 0:
-            audio = audio / np.max(np.abs(audio)) * 0.8
+        # Normalize audio to prevent clipping (in place, one peak measurement)
+        peak = max(audio.max(), -audio.min())
+        if peak > 0:
+            audio *= 0.8 / peak
         
         # Save to WAV
         print(f"💾 Saving WAV: {wav_path}")
@@ -63,20 +65,21 @@ def midi_to_wav(midi_path, wav_path, sample_rate=44100):
 def analyze_midi(midi_path):
     """Analyze MIDI file contents"""
     try:
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
+        # Parse-only path: symusic reads the file in C++ and hands back note columns
+        score = symusic.Score(midi_path, ttype='second')
         
         print(f"\n🔍 MIDI Analysis:")
-        print(f"   Duration: {midi_data.get_end_time():.2f}s")
-        print(f"   Tempo changes: {len(midi_data.tempo_changes)}")
+        print(f"   Duration: {score.end():.2f}s")
+        print(f"   Tempo changes: {len(score.tempos)}")
         
-        for i, instrument in enumerate(midi_data.instruments):
-            print(f"   Instrument {i}: {instrument.name} (Program {instrument.program})")
-            print(f"     Notes: {len(instrument.notes)}")
+        for i, track in enumerate(score.tracks):
+            notes = track.notes.numpy()
+            print(f"   Instrument {i}: {track.name} (Program {track.program})")
+            print(f"     Notes: {len(notes['pitch'])}")
             
-            if instrument.notes:
-                pitches = [note.pitch for note in instrument.notes]
-                print(f"     Pitch range: {min(pitches)} to {max(pitches)}")
-                print(f"     Duration range: {min(note.end - note.start for note in instrument.notes):.3f}s to {max(note.end - note.start for note in instrument.notes):.3f}s")
+            if len(notes['pitch']):
+                print(f"     Pitch range: {notes['pitch'].min()} to {notes['pitch'].max()}")
+                print(f"     Duration range: {notes['duration'].min():.3f}s to {notes['duration'].max():.3f}s")
         
     except Exception as e:
         print(f"❌ Analysis failed: {e}")
@@ -4,9 +4,14 @@ Simple MIDI to WAV conversion using sine wave synthesis
 """
 
 import pretty_midi
+import symusic
 import numpy as np
 import soundfile as sf
 
+# Equal-tempered frequency (Hz) of every MIDI pitch, A4 (69) = 440 Hz, as plain floats
+# for per-note lookups
+MIDI_FREQ = (440.0 * 2.0 ** ((np.arange(128) - 69) / 12.0)).tolist()
+
 def midi_to_wav_simple(midi_path, wav_path, sample_rate=44100):
     """
     Convert MIDI to WAV using simple sine wave synthesis
@@ -27,9 +32,9 @@ def midi_to_wav_simple(midi_path, wav_path, sample_rate=44100):
         total_notes = sum(len(inst.notes) for inst in midi_data.instruments)
         print(f"📊 Total notes: {total_notes}")
         
-        # Create audio buffer
+        # Create audio buffer (float32 throughout; the WAV is written as 16-bit PCM)
         audio_length = int(duration * sample_rate)
-        audio = np.zeros(audio_length)
+        audio = np.zeros(audio_length, dtype=np.float32)
         
         print("🔊 Synthesizing with sine waves...")
         
@@ -40,7 +45,7 @@ def midi_to_wav_simple(midi_path, wav_path, sample_rate=44100):
             # Synthesize each note
             for note in instrument.notes:
                 # Convert MIDI note to frequency
-                freq = 440 * (2 ** ((note.pitch - 69) / 12))
+                freq = MIDI_FREQ[note.pitch]
                 
                 # Calculate sample indices
                 start_sample = int(note.start * sample_rate)
@@ -54,10 +59,10 @@ def midi_to_wav_simple(midi_path, wav_path, sample_rate=44100):
                 
                 # Generate sine wave for this note
                 note_length = end_sample - start_sample
-                t = np.linspace(0, note_length / sample_rate, note_length)
+                t = np.linspace(0, note_length / sample_rate, note_length, dtype=np.float32)
                 
                 # Create envelope (attack, decay, release)
-                envelope = np.ones(note_length)
+                envelope = np.ones(note_length, dtype=np.float32)
                 attack_samples = min(int(0.01 * sample_rate), note_length // 4)  # 10ms attack
                 release_samples = min(int(0.05 * sample_rate), note_length // 4)  # 50ms release
                 
@@ -76,9 +81,10 @@ def midi_to_wav_simple(midi_path, wav_path, sample_rate=44100):
                 # Add to audio buffer
                 audio[start_sample:end_sample] += sine_wave
         
-        # Normalize to prevent clipping
-        if np.max(np.abs(audio)) > 0:
-            audio = audio / np.max(np.abs(audio)) * 0.8
+        # Normalize to prevent clipping (in place, one peak measurement)
+        peak = max(audio.max(), -audio.min())
+        if peak > 0:
+            audio *= 0.8 / peak
         
         # Save to file
         print(f"💾 Saving to: {wav_path}")
@@ -95,35 +101,41 @@ def midi_to_wav_simple(midi_path, wav_path, sample_rate=44100):
 def analyze_midi_notes(midi_path):
     """Analyze the transcribed notes"""
     try:
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
+        # Parse-only path: symusic reads the file in C++ and hands back note columns
+        score = symusic.Score(midi_path, ttype='second')
         
         print(f"\n🔍 Detailed MIDI Analysis:")
         print(f"   File: {midi_path}")
-        print(f"   Duration: {midi_data.get_end_time():.2f}s")
+        print(f"   Duration: {score.end():.2f}s")
         
-        for i, instrument in enumerate(midi_data.instruments):
-            notes = instrument.notes
-            if not notes:
+        for i, track in enumerate(score.tracks):
+            notes = track.notes.numpy()
+            if not len(notes['pitch']):
                 continue
                 
-            print(f"\n   Instrument {i} ({instrument.name}):")
-            print(f"     Program: {instrument.program}")
-            print(f"     Notes: {len(notes)}")
+            print(f"\n   Instrument {i} ({track.name}):")
+            print(f"     Program: {track.program}")
+            print(f"     Notes: {len(notes['pitch'])}")
             
             # Analyze pitch distribution
-            pitches = [note.pitch for note in notes]
-            print(f"     Pitch range: {min(pitches)} to {max(pitches)} (MIDI notes)")
-            print(f"     Most common pitches: {sorted(set(pitches), key=pitches.count, reverse=True)[:5]}")
+            pitches = notes['pitch'].astype(np.int32)
+            pitch_counts = np.bincount(pitches, minlength=128)
+            most_common = np.argsort(-pitch_counts, kind='stable')[:5]
+            most_common = most_common[pitch_counts[most_common] > 0].tolist()
+            print(f"     Pitch range: {pitches.min()} to {pitches.max()} (MIDI notes)")
+            print(f"     Most common pitches: {most_common}")
             
             # Analyze timing
-            note_durations = [note.end - note.start for note in notes]
-            print(f"     Note duration range: {min(note_durations):.3f}s to {max(note_durations):.3f}s")
-            print(f"     Average note duration: {np.mean(note_durations):.3f}s")
+            note_durations = notes['duration']
+            print(f"     Note duration range: {note_durations.min():.3f}s to {note_durations.max():.3f}s")
+            print(f"     Average note duration: {note_durations.mean():.3f}s")
             
             # Sample some notes
             print(f"     First 5 notes:")
-            for j, note in enumerate(notes[:5]):
-                print(f"       {j+1}. Pitch {note.pitch}, {note.start:.2f}s-{note.end:.2f}s, vel {note.velocity}")
+            for j, (start, duration, pitch, velocity) in enumerate(zip(
+                    notes['time'][:5].tolist(), notes['duration'][:5].tolist(),
+                    notes['pitch'][:5].tolist(), notes['velocity'][:5].tolist())):
+                print(f"       {j+1}. Pitch {pitch}, {start:.2f}s-{start + duration:.2f}s, vel {velocity}")
                 
     except Exception as e:
         print(f"❌ Analysis error: {e}")
@@ -5,22 +5,28 @@ Direct test of the audio processing pipeline
 
 import sys
 import os
+import shutil
+import tempfile
 import torch
 import numpy as np
 
 # Add backend to path
 sys.path.append('backend')
 
+# Scratch files go to RAM-backed /dev/shm when the system has it
+SCRATCH_ROOT = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
 def test_with_real_audio():
     """Test the AI processor with a real audio file"""
     print("🧪 Testing AI Processor with audio file...")
     
+    scratch_dir = tempfile.mkdtemp(prefix='test_audio_', dir=SCRATCH_ROOT)
     try:
         from services.ai_processor import AIProcessor
         
-        # Initialize the AI processor
+        # Initialize the AI processor (reusing the model if another test already loaded it)
         print("🔧 Initializing AI processor...")
-        success = AIProcessor.initialize()
+        success = AIProcessor.is_initialized() or AIProcessor.initialize()
         if not success:
             print("❌ Failed to initialize AI processor")
             return False
@@ -28,26 +34,24 @@ def test_with_real_audio():
         print("✅ AI processor initialized")
         
         # Create a test audio file (sine wave)
-        test_audio_path = "/tmp/test_piano.wav" 
-        output_midi_path = "/tmp/test_output.mid"
+        test_audio_path = os.path.join(scratch_dir, "test_piano.wav")
+        output_midi_path = os.path.join(scratch_dir, "test_output.mid")
         
         # Generate a simple test audio file (piano-like frequencies)
         import soundfile as sf
         sample_rate = 16000
         duration = 5.0  # 5 seconds
-        t = np.linspace(0, duration, int(sample_rate * duration))
         
         # Create a simple melody (C major scale notes)
-        frequencies = [261.63, 293.66, 329.63, 349.23, 392.00, 440.00, 493.88, 523.25]  # C4 to C5
-        audio = np.zeros_like(t)
+        frequencies = np.array([261.63, 293.66, 329.63, 349.23, 392.00, 440.00, 493.88, 523.25], dtype=np.float32)  # C4 to C5
+        audio = np.zeros(int(sample_rate * duration), dtype=np.float32)  # float32: the WAV is 16-bit PCM
         
-        # Add each note for 0.5 seconds
-        for i, freq in enumerate(frequencies):
-            start_idx = int(i * 0.5 * sample_rate)
-            end_idx = int((i + 0.5) * 0.5 * sample_rate)
-            if end_idx <= len(t):
-                note_audio = 0.3 * np.sin(2 * np.pi * freq * t[start_idx:end_idx])
-                audio[start_idx:end_idx] += note_audio
+        # Play each note for 0.5 seconds, back to back: one (notes x samples) block
+        # laid end to end at the start of the buffer
+        samples_per_note = int(0.5 * sample_rate)
+        t_note = np.arange(samples_per_note, dtype=np.float32) / np.float32(sample_rate)
+        notes = np.float32(0.3) * np.sin(np.float32(2 * np.pi) * frequencies[:, None] * t_note)
+        audio[:notes.size] = notes.reshape(-1)
         
         # Save as WAV
         sf.write(test_audio_path, audio, sample_rate)
@@ -76,8 +80,10 @@ def test_with_real_audio():
                         notes = midi_data.instruments[0].notes
                         print(f"   Notes detected: {len(notes)}")
                         if notes:
-                            note_pitches = [note.pitch for note in notes[:5]]  # First 5 notes
-                            print(f"   First 5 pitches: {note_pitches}")
+                            # One uint8 array of pitches for NumPy summaries
+                            pitches = np.fromiter((note.pitch for note in notes), dtype=np.uint8, count=len(notes))
+                            print(f"   First 5 pitches: {pitches[:5].tolist()}")
+                            print(f"   Pitch range: {pitches.min()} to {pitches.max()}")
                     
                     return True
                 except Exception as e:
@@ -95,6 +101,8 @@ def test_with_real_audio():
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
 def main():
     """Run the test"""
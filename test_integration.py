@@ -3,20 +3,38 @@
 Test script to verify the model integration works
 """
 
+import functools
 import sys
 import os
+import shutil
+import tempfile
 import numpy as np
 import torch
 
 # Add backend to path
 sys.path.append('backend')
 
+# Scratch files go to RAM-backed /dev/shm when the system has it
+SCRATCH_ROOT = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+@functools.lru_cache(maxsize=1)
+def get_model():
+    """Create the CRNN once; the creation and inference tests share it"""
+    from models.piano_transcription import create_model
+    return create_model(device='cpu')
+
+def get_processor():
+    """Initialize AIProcessor unless an earlier test (in any file) already did"""
+    from services.ai_processor import AIProcessor
+    if AIProcessor.is_initialized() or AIProcessor.initialize():
+        return AIProcessor
+    return None
+
 def test_model_creation():
     """Test that we can create the model"""
     print("🧪 Testing model creation...")
     try:
-        from models.piano_transcription import create_model
-        model = create_model(device='cpu')
+        model = get_model()
         print(f"✅ Model created: {model.name}, {sum(p.numel() for p in model.parameters()):,} parameters")
         return model
     except Exception as e:
@@ -51,12 +69,18 @@ def test_model_inference():
         if model is None:
             return False
         
-        # Create dummy input: [1, 128, 312] (batch=1, mels=128, time=312)
-        dummy_input = torch.randn(1, 128, 312)
+        # Create dummy input: [8, 128, 312] (batch=8, mels=128, time=312), the way
+        # long audio is chunked and batched in production
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        model = model.to(device, memory_format=torch.channels_last)  # as in AIProcessor
+        dummy_input = torch.randn(8, 128, 312, device=device)
         
-        with torch.no_grad():
+        # Mixed precision: fp16 on CUDA, bf16 on CPU; weights stay fp32
+        amp_dtype = torch.float16 if device.type == 'cuda' else torch.bfloat16
+        with torch.inference_mode(), torch.autocast(device_type=device.type, dtype=amp_dtype):
             output = model(dummy_input)
         
+        assert output.shape[0] == 8, f"Expected batch of 8 predictions, got {output.shape}"
         print(f"✅ Model inference works: input {dummy_input.shape} -> output {output.shape}")
         return output
     except Exception as e:
@@ -66,11 +90,12 @@ def test_model_inference():
 def test_midi_generation():
     """Test that we can generate MIDI from predictions"""
     print("\n🧪 Testing MIDI generation...")
+    scratch_dir = tempfile.mkdtemp(prefix='test_midi_', dir=SCRATCH_ROOT)
     try:
-        from services.midi_generator import create_test_midi, predictions_to_midi
+        from services.midi_generator import create_test_midi, predictions_to_midi, predictions_batch_to_midi
         
         # Test 1: Create a simple test MIDI
-        test_path = "/tmp/test_melody.mid"
+        test_path = os.path.join(scratch_dir, "test_melody.mid")
         success = create_test_midi(test_path)
         if success:
             print("✅ Test MIDI creation works")
@@ -80,28 +105,39 @@ def test_midi_generation():
         
         # Test 2: Convert dummy predictions to MIDI
         dummy_predictions = torch.sigmoid(torch.randn(1, 88, 312))  # Random probabilities
-        prediction_path = "/tmp/test_predictions.mid"
-        success = predictions_to_midi(dummy_predictions, prediction_path)
+        prediction_path = os.path.join(scratch_dir, "test_predictions.mid")
+        success = predictions_to_midi(dummy_predictions, prediction_path, already_probs=True)
         if success:
             print("✅ Prediction to MIDI conversion works")
-            return True
         else:
             print("❌ Prediction to MIDI conversion failed")
             return False
+        
+        # Test 3: Convert a batch of predictions to one MIDI file each
+        batch_predictions = torch.randn(4, 88, 312)  # Raw logits
+        batch_paths = [os.path.join(scratch_dir, f"test_batch_{i}.mid") for i in range(4)]
+        results = predictions_batch_to_midi(batch_predictions, batch_paths)
+        if all(results) and all(os.path.exists(path) for path in batch_paths):
+            print("✅ Batch prediction to MIDI conversion works")
+            return True
+        else:
+            print("❌ Batch prediction to MIDI conversion failed")
+            return False
             
     except Exception as e:
         print(f"❌ MIDI generation failed: {e}")
         return False
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
 def test_ai_processor():
     """Test the full AIProcessor pipeline"""
     print("\n🧪 Testing AIProcessor initialization...")
+    scratch_dir = tempfile.mkdtemp(prefix='test_ai_', dir=SCRATCH_ROOT)
     try:
-        from services.ai_processor import AIProcessor
-        
         # Test initialization
-        success = AIProcessor.initialize()
-        if success:
+        AIProcessor = get_processor()
+        if AIProcessor is not None:
             print("✅ AIProcessor initialized successfully")
             
             # Test model info
@@ -109,7 +145,7 @@ def test_ai_processor():
             print(f"📊 Model info: {info}")
             
             # Test demo MIDI creation
-            demo_path = "/tmp/demo.mid"
+            demo_path = os.path.join(scratch_dir, "demo.mid")
             success, message = AIProcessor.create_demo_midi(demo_path)
             if success:
                 print(f"✅ Demo MIDI: {message}")
@@ -124,6 +160,8 @@ def test_ai_processor():
     except Exception as e:
         print(f"❌ AIProcessor test failed: {e}")
         return False
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
 def main():
     """Run all integration tests"""
@@ -4,9 +4,99 @@ Upload the piano transcription model to Hugging Face Hub
 Run this script to upload the model: python upload_model_to_hf.py
 """
 
+import importlib.util
 import os
+import sys
+import tempfile
 from pathlib import Path
-from huggingface_hub import HfApi, login
+import torch
+
+# hf_transfer (Rust) uploads LFS files over parallel connections; huggingface_hub reads
+# the flag at import time and errors if it is set without the package installed
+HF_TRANSFER_AVAILABLE = importlib.util.find_spec('hf_transfer') is not None
+if HF_TRANSFER_AVAILABLE:
+    os.environ.setdefault('HF_HUB_ENABLE_HF_TRANSFER', '1')
+
+from huggingface_hub import CommitOperationAdd, HfApi, login
+from safetensors.torch import save_file
+
+# Add backend to path
+sys.path.append('backend')
+
+from models.piano_transcription import CRNN_OnsetsAndFrames, CRNN_OnsetsAndFrames_Original
+
+# The ONNX export needs the onnx package; without it only TorchScript is exported
+ONNX_AVAILABLE = importlib.util.find_spec('onnx') is not None
+
+def load_state_dict(model_path):
+    """Read the state_dict out of a training checkpoint"""
+    checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
+    if isinstance(checkpoint, dict) and 'model_state_dict' in checkpoint:
+        return checkpoint['model_state_dict']
+    elif isinstance(checkpoint, dict):
+        return checkpoint
+    else:
+        raise ValueError("Unknown checkpoint format")
+
+def checkpoint_to_safetensors(model_path, output_path):
+    """Write the checkpoint's state_dict as safetensors (no pickle, mmap-able on load)"""
+    state_dict = load_state_dict(model_path)
+    
+    # safetensors stores plain contiguous tensors only
+    save_file({name: tensor.contiguous() for name, tensor in state_dict.items()}, output_path)
+
+def build_model(model_path):
+    """Instantiate the checkpoint's architecture with its trained weights, in eval mode"""
+    state_dict = load_state_dict(model_path)
+    
+    # Same architecture detection as load_model, but a mismatch is an error here
+    # rather than a silent fall back to random weights
+    if any(key.startswith('classifier.') for key in state_dict):
+        model = CRNN_OnsetsAndFrames_Original()
+    else:
+        model = CRNN_OnsetsAndFrames()
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+def export_int8_model(model_path, output_path):
+    """Save a dynamically quantized (INT8 LSTM + Linear weights) state_dict for CPU inference"""
+    quantized = torch.ao.quantization.quantize_dynamic(
+        build_model(model_path), {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8
+    )
+    torch.save(quantized.state_dict(), output_path)
+
+def export_portable_models(model_path, output_dir):
+    """
+    Export the trained model as TorchScript (model.pt) and, if onnx is installed,
+    ONNX (model.onnx), both taking [B, 128, T] mels with any batch size and length
+    
+    Returns:
+        list: (local_path, path_in_repo) pairs of the exported files
+    """
+    model = build_model(model_path)
+    dummy_input = torch.randn(1, 128, 312)  # One 10-second window
+    exported = []
+    
+    with torch.no_grad():
+        torchscript_path = os.path.join(output_dir, "model.pt")
+        torch.jit.trace(model, dummy_input).save(torchscript_path)
+        exported.append((torchscript_path, "model.pt"))
+        print(f"✅ Exported TorchScript: model.pt")
+        
+        if ONNX_AVAILABLE:
+            onnx_path = os.path.join(output_dir, "model.onnx")
+            # The TorchScript-based exporter keeps batch and time dynamic via dynamic_axes
+            torch.onnx.export(model, (dummy_input,), onnx_path, dynamo=False, opset_version=17,
+                              input_names=['mel'], output_names=['logits'],
+                              dynamic_axes={'mel': {0: 'batch', 2: 'frames'},
+                                            'logits': {0: 'batch', 2: 'frames'}})
+            exported.append((onnx_path, "model.onnx"))
+            print(f"✅ Exported ONNX: model.onnx")
+        else:
+            print("⚠️  onnx not installed, skipping ONNX export")
+    
+    return exported
 
 def upload_model():
     """Upload the piano transcription model to Hugging Face Hub"""
@@ -33,6 +123,8 @@ def upload_model():
         repo_id = "kevinjasinghe/piano-transcription-model"
         
         print(f"📤 Uploading model to {repo_id}...")
+        if not HF_TRANSFER_AVAILABLE:
+            print("💡 pip install hf_transfer for faster parallel uploads")
         
         # Create repository if it doesn't exist
         try:
@@ -41,14 +133,6 @@ def upload_model():
         except Exception as e:
             print(f"⚠️  Repository creation warning: {e}")
         
-        # Upload the model file
-        api.upload_file(
-            path_or_fileobj=model_path,
-            path_in_repo="pytorch_model.bin",
-            repo_id=repo_id,
-            commit_message="Upload piano transcription model"
-        )
-        
         # Create a README for the model
         readme_content = """---
 license: mit
@@ -77,17 +161,45 @@ This is a PyTorch model trained for piano transcription - converting audio recor
 ## Usage
 
 ```python
-import torch
 from huggingface_hub import hf_hub_download
+from safetensors.torch import load_file
 
-# Download the model
+# Download the model weights
 model_path = hf_hub_download(
     repo_id="kevinjasinghe/piano-transcription-model",
-    filename="pytorch_model.bin"
+    filename="model.safetensors"
 )
 
-# Load the model
-model = torch.load(model_path, map_location='cpu')
+# Load the state dict (memory-mapped, no unpickling) into the CRNN
+state_dict = load_file(model_path, device='cpu')
+model.load_state_dict(state_dict)
+```
+
+`pytorch_model.bin` (the original pickled checkpoint) is also available for older code.
+
+### TorchScript / ONNX
+
+`model.pt` (TorchScript) and `model.onnx` run without the model's Python code.
+Both take mel features `[batch, 128, frames]` and return logits `[batch, 88, frames]`:
+
+```python
+import torch
+model = torch.jit.load("model.pt")
+
+import onnxruntime as ort
+session = ort.InferenceSession("model.onnx")
+logits = session.run(None, {"mel": mel_features})[0]
+```
+
+### INT8 (CPU)
+
+`model_int8.pt` holds the state dict after dynamic INT8 quantization of the LSTM and
+Linear layers (about 4x smaller and ~30% faster on CPU). Quantize the float model the
+same way before loading it:
+
+```python
+model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8)
+model.load_state_dict(torch.load("model_int8.pt", weights_only=False))  # packed INT8 params are pickled
 ```
 
 ## Training Details
@@ -108,17 +220,37 @@ model = torch.load(model_path, map_location='cpu')
 MIT License - Feel free to use for research and commercial applications.
 """
         
-        # Upload README
-        api.upload_file(
-            path_or_fileobj=readme_content.encode(),
-            path_in_repo="README.md",
-            repo_id=repo_id,
-            commit_message="Add model documentation"
-        )
+        # Every file goes up in one Hub commit; huggingface_hub uploads the LFS files
+        # in parallel (num_threads) and a single commit avoids racing commits on main
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # The weights as safetensors: loading maps the file instead of unpickling it
+            safetensors_path = os.path.join(temp_dir, "model.safetensors")
+            checkpoint_to_safetensors(model_path, safetensors_path)
+            print(f"🔄 Converted checkpoint to safetensors")
+            uploads = [(safetensors_path, "model.safetensors")]
+            
+            # Graph exports for TorchScript / ONNX Runtime consumers, plus the INT8 CPU variant
+            uploads += export_portable_models(model_path, temp_dir)
+            int8_path = os.path.join(temp_dir, "model_int8.pt")
+            export_int8_model(model_path, int8_path)
+            print(f"✅ Quantized LSTM/Linear weights to INT8: model_int8.pt")
+            uploads.append((int8_path, "model_int8.pt"))
+            
+            # Keep the pickled checkpoint for existing pytorch_model.bin download links
+            uploads.append((model_path, "pytorch_model.bin"))
+            uploads.append((readme_content.encode(), "README.md"))
+            
+            api.create_commit(
+                repo_id=repo_id,
+                operations=[CommitOperationAdd(path_in_repo=path_in_repo, path_or_fileobj=source)
+                            for source, path_in_repo in uploads],
+                commit_message="Upload piano transcription model and documentation",
+                num_threads=len(uploads)
+            )
         
         print(f"✅ Model uploaded successfully!")
         print(f"🔗 Model URL: https://huggingface.co/{repo_id}")
-        print(f"📥 Download URL: https://huggingface.co/{repo_id}/resolve/main/pytorch_model.bin")
+        print(f"📥 Download URL: https://huggingface.co/{repo_id}/resolve/main/model.safetensors")
         
         return True
         